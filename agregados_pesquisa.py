@@ -0,0 +1,103 @@
+import threading
+import pandas as pd
+from tratamento_respostas import tratar_dataframe, chave_resposta
+from opcoes_pesquisa import paineis_lista, categoria_lista, importancia_lista
+
+# Tabelas agregadas da pesquisa (notas por painel, horas por categoria/tipo e importância),
+# mantidas de forma incremental: cada atualização trata só as respostas novas e soma os
+# subtotais delas às tabelas, em vez de recalcular tudo a partir da base bruta.
+
+COL_HORAS = 'Ferramenta - Horas gastas mensais'
+
+
+def _somar(atual, novo):
+    if atual is None:
+        return novo
+    return atual.add(novo, fill_value=0)
+
+
+class AgregadosPesquisa:
+    """
+    Agregados da base tratada com o mesmo controle do TratamentoIncremental:
+    guarda quantas respostas já foram somadas e a chave da última; se a base só cresceu,
+    soma apenas as novas; se foi reescrita, recomeça do zero.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.linhas = 0
+        self.chave = None
+        self.notas = None        # por painel: soma das notas, avaliações e citações
+        self.horas = None        # por (categoria, tipo): horas mensais e ferramentas
+        self.importancia = None  # por importância: ferramentas
+
+    def adicionar(self, df_tratado):
+        """
+        Soma os subtotais de um trecho da base tratada às tabelas agregadas.
+        """
+        paineis = df_tratado[df_tratado['Tipo'] == 'Painel']
+        notas = paineis.groupby('Nome')['Nota'].agg(Soma='sum', Avaliações='count', Citações='size')
+        self.notas = _somar(self.notas, notas)
+
+        ferramentas = df_tratado[df_tratado['Tipo'] == 'Ferramenta']
+        horas = pd.to_numeric(ferramentas[COL_HORAS], errors='coerce').groupby(
+            [ferramentas['Ferramenta - Categoria'].fillna('Sem categoria'),
+             ferramentas['Ferramenta - Tipo'].fillna('Sem tipo')]
+        ).agg(Horas='sum', Ferramentas='size')
+        horas.index.names = ['Categoria', 'Tipo']
+        self.horas = _somar(self.horas, horas)
+
+        importancia = ferramentas['Ferramenta - Importância'].fillna('Sem importância').value_counts()
+        self.importancia = _somar(self.importancia, importancia)
+
+    def atualizar(self, df_bruto):
+        """
+        Incorpora as respostas da base bruta ainda não agregadas. Retorna quantas foram somadas.
+        """
+        with self._trava:
+            if self.linhas and (len(df_bruto) < self.linhas
+                                or chave_resposta(df_bruto.iloc[self.linhas - 1]) != self.chave):
+                self.reiniciar()
+            novas = df_bruto.iloc[self.linhas:]
+            if not novas.empty:
+                self.adicionar(tratar_dataframe(novas))
+                self.linhas, self.chave = len(df_bruto), chave_resposta(df_bruto.iloc[-1])
+            return len(novas)
+
+    def media_notas(self):
+        """
+        Nota média, avaliações e citações por painel, na ordem de paineis_lista
+        (painéis antigos, fora da lista atual, aparecem no final).
+        """
+        if self.notas is None:
+            return pd.DataFrame(columns=['Nota média', 'Avaliações', 'Citações'])
+        ordem = [p for p in paineis_lista if p in self.notas.index]
+        ordem += [p for p in self.notas.index if p not in paineis_lista]
+        tabela = self.notas.reindex(ordem)
+        tabela['Nota média'] = (tabela['Soma'] / tabela['Avaliações'].where(tabela['Avaliações'] > 0)).round(2)
+        tabela = tabela[['Nota média', 'Avaliações', 'Citações']].astype({'Avaliações': int, 'Citações': int})
+        return tabela.rename_axis('Painel')
+
+    def horas_por_categoria_tipo(self):
+        """
+        Horas mensais somadas: uma linha por categoria (ordem de categoria_lista) e uma coluna por tipo.
+        """
+        if self.horas is None:
+            return pd.DataFrame()
+        tabela = self.horas['Horas'].unstack('Tipo', fill_value=0)
+        ordem = [c for c in categoria_lista if c in tabela.index]
+        ordem += [c for c in tabela.index if c not in categoria_lista]
+        return tabela.reindex(ordem)
+
+    def distribuicao_importancia(self):
+        """
+        Quantidade de ferramentas por nível de importância, na ordem de importancia_lista.
+        """
+        if self.importancia is None:
+            return pd.Series(dtype='int64', name='Ferramentas')
+        ordem = importancia_lista + [i for i in self.importancia.index if i not in importancia_lista]
+        distribuicao = self.importancia.reindex(ordem, fill_value=0).astype(int)
+        return distribuicao.rename('Ferramentas').rename_axis('Importância')
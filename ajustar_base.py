@@ -1,11 +1,10 @@
 import pandas as pd
+from leitura_base import ler_base_em_blocos, EscritorExcelIncremental
+from esquema_resposta import COL_VERSAO, VERSAO_ESQUEMA
 
 # Caminho para a planilha original
 arquivo = 'base_dados_pesquisa_PO.xlsx'
 
-# Carrega a planilha
-df = pd.read_excel(arquivo)
-
 # Função para ajustar a string
 def ajustar_ferramenta(ferramentas_str):
     if pd.isnull(ferramentas_str):
@@ -24,11 +23,24 @@ def ajustar_ferramenta(ferramentas_str):
             ferramentas_ajustadas.append(ferramenta)
     return ';'.join(ferramentas_ajustadas)
 
-# Aplica a função na coluna "Ferramentas"
-df['Ferramentas'] = df['Ferramentas'].apply(ajustar_ferramenta)
-
 # Salva como nova planilha
 novo_arquivo = 'base_dados_pesquisa_PO_ajustada.xlsx'
-df.to_excel(novo_arquivo, index=False)
+
+# Lê a planilha em blocos, aplica a função na coluna "Ferramentas" e grava cada bloco
+# assim que é ajustado (a memória usada não cresce com o tamanho da base).
+# Só as linhas no formato antigo (texto) são ajustadas: nas linhas da versão 2 a coluna
+# é uma lista JSON, e trocar as vírgulas a corromperia.
+escritor = None
+for bloco in ler_base_em_blocos(arquivo):
+    if escritor is None:
+        escritor = EscritorExcelIncremental(novo_arquivo, bloco.columns)
+    legadas = pd.Series(True, index=bloco.index)
+    if COL_VERSAO in bloco.columns:
+        legadas = pd.to_numeric(bloco[COL_VERSAO], errors='coerce') != VERSAO_ESQUEMA
+    bloco.loc[legadas, 'Ferramentas'] = bloco.loc[legadas, 'Ferramentas'].apply(ajustar_ferramenta)
+    escritor.anexar(bloco)
+
+if escritor is not None:
+    escritor.fechar()
 
 print(f"✅ Ajuste concluído! Arquivo salvo como '{novo_arquivo}'")
@@ -1,13 +1,10 @@
 # Importação de bibliotecas necessárias
 import streamlit as st  # Framework principal para criação da interface web
-import pandas as pd  # Manipulação de dados
 from PIL import Image  # Manipulação de imagens
-import base64  # Codificação/decodificação base64 (para comunicação com GitHub)
-import json  # Manipulação de objetos JSON
-import requests  # Realização de requisições HTTP
-import io  # Manipulação de fluxos de dados binários
-from datetime import datetime  # Manipulação de datas e horários
 from guia_lateral import mostrar_guia_lateral  # Função personalizada para mostrar guia lateral
+from armazenamento import criar_backend, CaixaSaida  # Backends de armazenamento das respostas
+from esquema_resposta import montar_resposta, CAMPOS_FERRAMENTA  # Formato estruturado (versionado) de cada envio
+from opcoes_pesquisa import paineis_lista, categoria_lista, tipo_lista, importancia_lista  # Opções do formulário
 
 # =========================== CONFIGURAÇÃO DA PÁGINA ===========================
 
@@ -18,53 +15,106 @@ st.set_page_config(
     layout="wide"
 )
 
+# O logo é carregado uma única vez por processo, e não a cada interação (rerun) do usuário
+@st.cache_resource
+def carregar_logo():
+    return Image.open("logo_mrv_light.png")
+
 # Configuração da barra lateral
 with st.sidebar:
-    logo = Image.open("logo_mrv_light.png")  # Carrega a imagem do logo
+    logo = carregar_logo()  # Carrega a imagem do logo (em cache)
     st.image(logo, width=240)  # Exibe o logo na barra lateral
     st.title("Planejamento Operacional")
     st.markdown("## 📝 Levantamento de Ferramentas e Painéis")
     mostrar_guia_lateral()  # Exibe a guia lateral personalizada
 
-# =========================== CONFIGURAÇÃO DO GITHUB ===========================
-
-# Credenciais e informações do repositório GitHub via secrets
-GITHUB_TOKEN = st.secrets["github"]["token"]
-GITHUB_USERNAME = st.secrets["github"]["username"]
-REPO_NAME = st.secrets["github"]["repo"]
-FILE_PATH = st.secrets["github"]["file_path"]
-BRANCH = st.secrets["github"]["branch"]
-
-# Cabeçalho de autenticação para requisições à API do GitHub
-headers = {
-    "Authorization": f"token {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json"
-}
-
-# Função para carregar a planilha existente no repositório do GitHub
-def carregar_planilha_do_github():
-    url = f"https://api.github.com/repos/{GITHUB_USERNAME}/{REPO_NAME}/contents/{FILE_PATH}?ref={BRANCH}"
-    r = requests.get(url, headers=headers)
-    if r.status_code == 200:
-        content = base64.b64decode(r.json()["content"])
-        return pd.read_excel(io.BytesIO(content)), r.json()["sha"]
+# =========================== CONFIGURAÇÃO DO ARMAZENAMENTO ===========================
+
+# O backend é escolhido pelos secrets (seção [armazenamento]); o padrão é o GitHub.
+# Credenciais do GitHub ficam na seção [github]. Ver armazenamento.criar_backend.
+# Os envios passam por uma caixa de saída local (SQLite), compartilhada por todas as sessões:
+# o formulário confirma assim que a resposta é gravada localmente e a entrega ao backend
+# acontece em segundo plano, em lotes e com novas tentativas se o GitHub estiver fora do ar.
+@st.cache_resource
+def obter_caixa_saida():
+    opcoes = st.secrets.get("armazenamento", {})
+    return CaixaSaida(
+        criar_backend(st.secrets),
+        caminho=opcoes.get("caixa_saida", "caixa_saida.db"),
+        janela=opcoes.get("janela_envio", 1.0)
+    )
+
+caixa_saida = obter_caixa_saida()
+
+# Situação da entrega de um envio, atualizada a cada poucos segundos sem recarregar a página
+@st.fragment(run_every=3)
+def mostrar_situacao_envio(id_envio):
+    situacao = caixa_saida.situacao(id_envio)
+    if situacao is None:
+        return
+    if situacao["status"] == CaixaSaida.ENTREGUE:
+        st.caption(f"📬 Resposta entregue à base de dados em {situacao['entregue_em']}.")
+    elif situacao["tentativas"]:
+        st.caption(f"⏳ Entrega pendente após {situacao['tentativas']} tentativa(s); "
+                   "a resposta está guardada e será reenviada automaticamente.")
     else:
-        return pd.DataFrame(), None
-
-# Função para salvar a planilha atualizada de volta ao GitHub
-def salvar_planilha_no_github(df, sha):
-    output = io.BytesIO()
-    df.to_excel(output, index=False)
-    content_encoded = base64.b64encode(output.getvalue()).decode("utf-8")
-    url = f"https://api.github.com/repos/{GITHUB_USERNAME}/{REPO_NAME}/contents/{FILE_PATH}"
-    data = {
-        "message": "Atualizando base de dados da pesquisa via Streamlit",
-        "content": content_encoded,
-        "branch": BRANCH,
-        "sha": sha
+        st.caption("⏳ Enviando resposta para a base de dados...")
+
+# =========================== ESTADO DO FORMULÁRIO ===========================
+
+# Cada ferramenta tem um número fixo (não a posição na tela). st.session_state.ferramentas guarda
+# só esses números, na ordem de exibição; os valores ficam nas chaves dos próprios widgets
+# ("ferramenta_{id}_{campo}"). Remover uma ferramenta apaga apenas as chaves dela, sem renumerar
+# as demais. Os botões usam callbacks (on_click), que rodam antes da nova execução da página,
+# então não é preciso forçar outro recarregamento.
+def chave_ferramenta(id_ferramenta, campo):
+    return f"ferramenta_{id_ferramenta}_{campo}"
+
+def adicionar_ferramenta():
+    st.session_state.ferramentas.append(st.session_state.proxima_ferramenta)
+    st.session_state.proxima_ferramenta += 1
+
+def remover_ferramenta(id_ferramenta):
+    st.session_state.ferramentas.remove(id_ferramenta)
+    for campo in CAMPOS_FERRAMENTA:
+        st.session_state.pop(chave_ferramenta(id_ferramenta, campo), None)
+
+def reiniciar_formulario():
+    # Limpa só as chaves que existem: as ferramentas da lista e os painéis do formulário
+    for id_ferramenta in list(st.session_state.ferramentas):
+        remover_ferramenta(id_ferramenta)
+    for painel in paineis_lista:
+        st.session_state.pop(f"nota_{painel}", None)
+        st.session_state.pop(f"comentario_{painel}", None)
+    st.session_state.pop("paineis_usados", None)
+    st.session_state.pop("email", None)
+    adicionar_ferramenta()
+
+if "ferramentas" not in st.session_state:
+    st.session_state.ferramentas = []
+    st.session_state.proxima_ferramenta = 0
+    adicionar_ferramenta()  # O formulário começa com uma ferramenta
+
+def coletar_feedbacks():
+    # {painel: {comentario: ..., nota: ...}} dos painéis selecionados
+    return {
+        painel: {
+            "comentario": st.session_state.get(f"comentario_{painel}", ""),
+            "nota": st.session_state.get(f"nota_{painel}", 0)
+        }
+        for painel in st.session_state.get("paineis_usados", [])
     }
-    response = requests.put(url, headers=headers, data=json.dumps(data))
-    return response.status_code in [200, 201]
+
+def coletar_ferramentas():
+    # Ferramentas com nome preenchido, como dicionários com os CAMPOS_FERRAMENTA
+    ferramentas = []
+    for id_ferramenta in st.session_state.ferramentas:
+        ferramenta = {campo: st.session_state.get(chave_ferramenta(id_ferramenta, campo)) for campo in CAMPOS_FERRAMENTA}
+        if str(ferramenta["Nome"] or "").strip():
+            # ✅ Aqui garantimos que sempre será um float
+            ferramenta["Horas"] = float(ferramenta["Horas"] or 0.0)
+            ferramentas.append(ferramenta)
+    return ferramentas
 
 # =========================== FORMULÁRIO PRINCIPAL ===========================
 
@@ -77,156 +127,101 @@ st.markdown(
 
 # Campo de identificação do usuário
 st.subheader("👤 Identificação do usuário:")
-email = st.text_input("Digite seu e-mail MRV (@mrv.com.br)*:")
+email = st.text_input("Digite seu e-mail MRV (@mrv.com.br)*:", key="email")
 
 # =========================== PAINÉIS USADOS E FEEDBACKS ===========================
 
 st.subheader("📊 Quais painéis abaixo você utiliza?")
 
-paineis_lista = [
-    "Painel Análises Forecast de Produção - PLNESROBR009",
-    "Painel do Portifólio - Planejamento da Produção - PLNESROBR004",
-    "Painel Operações - Planejamento e Controle - PLNESROBR010",
-    "Painel Produção Produtividade e MO - PLNESROBR005",
-    "PAP - Dossiê",
-    "Painel AMP x PLS - CST002", 
-    "Painel Acompanhamento de Concreto - ENGPDC032",
-    "Painel Book Normas - ENGPDC018", 
-    "Painel Cheque Obra - ENGPDC015",
-    "Painel Cockpit Produção - ENGPDC010", 
-    "Painel Comunicação Integrada - ENGPDC028",
-    "Painel Custos Produção - ENGPDC009", 
-    "Painel de Materiais - ENGPDC005",
-    "Painel Gestão de Acesso Obras - ENGPDC011", 
-    "Painel Obra 360 - ENGPDC035",
-    "Painel Performance da Produção - ENGPDC029", 
-    "Painel Qualidade - ENGPDC007",
-    "Painel SSMA Regionais - ENGPDC030", 
-    "Relatório de Métricas de Preços e Serviços - ENGPDC004",
-    "Painel Gestão de Problema Pós Entrega - ASTTCN006",
-    "Painel Vistoria da Qualidade - ASTTCN010"
-]
-
-# Multiselect para selecionar painéis utilizados
-paineis_usados = st.multiselect("Selecione todos os painéis que você utiliza:* (Selecionar)", paineis_lista)
-
-# Seção de feedback sobre painéis
-st.subheader("Avalie os painéis selecionados e deixe seu feedback:")
-
-feedbacks = {}  # Dicionário para armazenar os feedbacks e avaliações
-
-# Para cada painel selecionado, gera uma linha com: nome, nota, comentário
-for painel in paineis_usados:
-    cols = st.columns([2, 1, 3])  # Dimensionar tamanho: Nome do painel | Nota | Comentário
-
-    with cols[0]:
-        st.markdown(
-            f"<span style='font-size:14px;'>{painel}</span>", 
-            unsafe_allow_html=True
-        )
-
-    with cols[1]:
-        nota = st.number_input(
-            label="Nota (0-10)*",
-            min_value=0,
-            max_value=10,
-            step=1,
-            key=f"nota_{painel}"
-        )
-
-    with cols[2]:
-        comentario = st.text_input(
-            label="Comentário (opcional)",
-            placeholder="Escreva ou deixe em branco",
-            key=f"comentario_{painel}"
-        )
-
-    # Armazena como dicionário: {comentario: ..., nota: ...}
-    feedbacks[painel] = {"comentario": comentario, "nota": nota}
+# A seção de painéis é um fragmento: selecionar um painel ou alterar uma nota/comentário
+# executa de novo só esta seção, e não a página inteira com todas as ferramentas
+@st.fragment
+def secao_paineis():
+    # Multiselect para selecionar painéis utilizados
+    paineis_usados = st.multiselect("Selecione todos os painéis que você utiliza:* (Selecionar)", paineis_lista,
+                                    key="paineis_usados")
+
+    # Seção de feedback sobre painéis
+    st.subheader("Avalie os painéis selecionados e deixe seu feedback:")
+
+    # Para cada painel selecionado, gera uma linha com: nome, nota, comentário
+    for painel in paineis_usados:
+        cols = st.columns([2, 1, 3])  # Dimensionar tamanho: Nome do painel | Nota | Comentário
+
+        with cols[0]:
+            st.markdown(
+                f"<span style='font-size:14px;'>{painel}</span>", 
+                unsafe_allow_html=True
+            )
+
+        with cols[1]:
+            st.number_input(
+                label="Nota (0-10)*",
+                min_value=0,
+                max_value=10,
+                step=1,
+                key=f"nota_{painel}"
+            )
+
+        with cols[2]:
+            st.text_input(
+                label="Comentário (opcional)",
+                placeholder="Escreva ou deixe em branco",
+                key=f"comentario_{painel}"
+            )
+
+secao_paineis()
 
 
 # =========================== FERRAMENTAS ===========================
 
 st.subheader("🔧 Ferramentas que você utiliza")
-if "ferramenta_count" not in st.session_state:
-    st.session_state.ferramenta_count = 1  # Inicializa o contador de ferramentas
-
-ferramentas = []  # Lista para armazenar as ferramentas como texto
-ferramentas_resumo = []  # Lista para armazenar as ferramentas como dicionário
 
-# Lista de categorias para seleção
-categoria_lista = [
-    "AUXÍLIO REGIONAL", "AMP X PLS", "DISCREPÂNCIA", "PROJECT",
-    "ESTOQUE", "MOP/EMP", "CUSTOS", "REPLAN", "TURNOVER",
-    "SEQUENCIAMENTO MO", "PRODUTIVIDADE", "HORAS EXTRAS", "MATERIAIS", "URBANIZAÇÃO", "OUTROS"
-]
+# Cada ferramenta é um fragmento: editar um campo executa de novo só o bloco dela,
+# então o tempo de cada interação não cresce com o número de ferramentas cadastradas
+@st.fragment
+def bloco_ferramenta(id_ferramenta, numero):
+    # Depois de "Remover", só este fragmento roda de novo: ele deixa de desenhar a ferramenta
+    if id_ferramenta not in st.session_state.ferramentas:
+        return
 
-# Lista para armazenar índices que devem ser removidos
-remover_indices = []
-
-# Loop para criar campos dinâmicos de ferramentas
-for i in range(st.session_state.ferramenta_count):
-    st.markdown(f"---\n### Ferramenta {i+1}")
+    st.markdown(f"---\n### Ferramenta {numero}")
     
     linha1 = st.columns([3, 3])
     with linha1[0]:
-        nome = st.text_input("Nome da Ferramenta* (Digitar)", key=f"nome_{i}")
+        st.text_input("Nome da Ferramenta* (Digitar)", key=chave_ferramenta(id_ferramenta, "Nome"))
     with linha1[1]:
-        objetivo = st.text_input("Objetivo* (Digitar)", key=f"objetivo_{i}")
+        st.text_input("Objetivo* (Digitar)", key=chave_ferramenta(id_ferramenta, "Objetivo"))
 
     linha2 = st.columns([2, 2, 2, 2])
     with linha2[0]:
-        tipo = st.selectbox("Tipo* (Selecionar)", [
-            "Power BI", "Excel", "Report e-mail", "Power Point",
-            "Python", "SAP BO + Excel", "BIG + Excel", "Outra"
-        ], key=f"tipo_{i}")
+        st.selectbox("Tipo* (Selecionar)", tipo_lista, key=chave_ferramenta(id_ferramenta, "Tipo"))
     with linha2[2]:
-        importancia = st.selectbox("Importância* (Selecionar)", [
-            "💎 Muito Importante", "🪙 Importante", "🟢 Pouco Importante", "🟠 Não Importante"
-        ], key=f"importancia_{i}")
+        st.selectbox("Importância* (Selecionar)", importancia_lista, key=chave_ferramenta(id_ferramenta, "Importância"))
     with linha2[3]:
-        horas = st.number_input("Horas gastas mensais* (Selecionar)", min_value=0.0, step=1.0, key=f"horas_{i}")
+        st.number_input("Horas gastas mensais* (Selecionar)", min_value=0.0, step=1.0,
+                        key=chave_ferramenta(id_ferramenta, "Horas"))
     with linha2[1]:
-        categoria = st.selectbox("Categoria* (Selecionar)", categoria_lista, key=f"categoria_{i}")
+        st.selectbox("Categoria* (Selecionar)", categoria_lista, key=chave_ferramenta(id_ferramenta, "Categoria"))
 
     # Botão de remoção para esta ferramenta
-    if st.button(f"🗑️ Remover Ferramenta {i+1}"):
-        remover_indices.append(i)
-
-
-    # Armazena a ferramenta preenchida
-    if nome.strip():
-        ferramenta_dict = {
-            "Nome": nome,
-            "Objetivo": objetivo,
-            "Tipo": tipo,
-            "Categoria": categoria,
-            "Importância": importancia,
-            # ✅ Aqui garantimos que sempre será um float
-            "Horas": float(horas) if isinstance(horas, (int, float)) else 0.0
-        }
-        ferramentas.append(json.dumps(ferramenta_dict, ensure_ascii=False))
-        ferramentas_resumo.append(ferramenta_dict)
-
+    st.button(f"🗑️ Remover Ferramenta {numero}", key=chave_ferramenta(id_ferramenta, "remover"),
+              on_click=remover_ferramenta, args=(id_ferramenta,))
 
-
-# Remove as ferramentas marcadas
-if remover_indices:
-    for idx in sorted(remover_indices, reverse=True):
-        for key in ["nome_", "objetivo_", "tipo_", "categoria_", "importancia_", "horas_"]:
-            st.session_state.pop(f"{key}{idx}", None)
-    st.session_state.ferramenta_count -= len(remover_indices)
-    st.rerun()
+for numero, id_ferramenta in enumerate(st.session_state.ferramentas, 1):
+    bloco_ferramenta(id_ferramenta, numero)
 
 # Botão para adicionar nova ferramenta
-if st.button("➕ Adicionar nova Ferramenta"):
-    st.session_state.ferramenta_count += 1
-    st.rerun()
+st.button("➕ Adicionar nova Ferramenta", on_click=adicionar_ferramenta)
 
 
 # =========================== ENVIO E SALVAMENTO ===========================
 
 if st.button("💾 Salvar e Enviar Resposta"):
+    # Os valores são lidos do estado da sessão, já atualizado pelos fragmentos
+    paineis_usados = st.session_state.get("paineis_usados", [])
+    feedbacks = coletar_feedbacks()
+    ferramentas_resumo = coletar_ferramentas()
     erros = []
 
     # Validação de campos obrigatórios por ferramenta
@@ -248,73 +243,47 @@ if st.button("💾 Salvar e Enviar Resposta"):
     if erros:
         st.error("Por favor, corrija os seguintes campos:\n" + "\n".join(erros))
     else:
-        # Monta a nova resposta como dicionário
-        nova_resposta = {
-            "E-mail MRV": email,
-            "Data/Hora do Envio": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "Painéis": "; ".join([f"{k}: {v}" for k, v in feedbacks.items()]),
-            "Ferramentas": "; ".join(ferramentas)
-        }
-
-        df_novo = pd.DataFrame([nova_resposta])
-
-        with st.spinner("Salvando resposta..."):
-            df_existente, sha = carregar_planilha_do_github()
-
-            if sha is None:
-                st.error("❌ Não foi possível carregar a planilha do GitHub.")
-            else:
-                df_total = pd.concat([df_existente, df_novo], ignore_index=True)
-                sucesso = salvar_planilha_no_github(df_total, sha)
-
-                if sucesso:
-                    st.success("✅ Resposta salva com sucesso. Agradecemos por sua contribuição!")
-
+        # Monta a nova resposta no formato estruturado: listas de painéis e de ferramentas,
+        # com versão do esquema e ID do envio (sem textos unidos por "; ")
+        nova_resposta = montar_resposta(email, feedbacks, ferramentas_resumo)
+
+        # A resposta é gravada na caixa de saída local (instantâneo) e entregue ao backend
+        # configurado em segundo plano; a planilha consolidada é reconstruída pelo compactar_base.py
+        try:
+            id_envio = caixa_saida.enviar(nova_resposta)
+            sucesso = True
+        except Exception:
+            sucesso = False
+
+        if sucesso:
+            st.success("✅ Resposta recebida. Agradecemos por sua contribuição!")
+            mostrar_situacao_envio(id_envio)
+
+            st.markdown(
+                "<h3>ℹ️ Gentileza, na pasta abaixo, faça o upload das ferramentas que você citou:<br>"
+                "link da pasta: <a href='https://mrvengenhariasa.sharepoint.com/:f:/s/PlanejamentoEstratgicodeObra/EqCtBFyFlLhKuW3NbOqI4KEB8YLkiAUnAt7XtTX6ve3FJA?e=TI40We' target='_blank'>Clique aqui</a></h3>",
+                unsafe_allow_html=True
+            )
+
+            with st.expander("🔍 Ver resumo do que foi enviado"):
+                st.markdown(f"**Email:** {email}")
+                st.markdown("**Painéis selecionados:**")
+                st.markdown(", ".join(paineis_usados) if paineis_usados else "_Nenhum painel selecionado_")
+                st.markdown("**Painéis comentados:**")
+                for painel, comentario in feedbacks.items():
+                    st.markdown(f"- {painel}: {comentario}")
+                st.markdown("**Ferramentas preenchidas:**")
+                for idx, f in enumerate(ferramentas_resumo, 1):
                     st.markdown(
-                        "<h3>ℹ️ Gentileza, na pasta abaixo, faça o upload das ferramentas que você citou:<br>"
-                        "link da pasta: <a href='https://mrvengenhariasa.sharepoint.com/:f:/s/PlanejamentoEstratgicodeObra/EqCtBFyFlLhKuW3NbOqI4KEB8YLkiAUnAt7XtTX6ve3FJA?e=TI40We' target='_blank'>Clique aqui</a></h3>",
-                        unsafe_allow_html=True
+                        f"{idx}. {f['Nome']} - {f['Objetivo']} ({f['Tipo']}/{f['Categoria']}) • {f['Importância']} • {f['Horas']}h/mês"
                     )
 
-                    with st.expander("🔍 Ver resumo do que foi enviado"):
-                        st.markdown(f"**Email:** {email}")
-                        st.markdown("**Painéis selecionados:**")
-                        st.markdown(", ".join(paineis_usados) if paineis_usados else "_Nenhum painel selecionado_")
-                        st.markdown("**Painéis comentados:**")
-                        for painel, comentario in feedbacks.items():
-                            st.markdown(f"- {painel}: {comentario}")
-                        st.markdown("**Ferramentas preenchidas:**")
-                        for idx, f in enumerate(ferramentas_resumo, 1):
-                            st.markdown(
-                                f"{idx}. {f['Nome']} - {f['Objetivo']} ({f['Tipo']}/{f['Categoria']}) • {f['Importância']} • {f['Horas']}h/mês"
-                            )
-
-                    st.markdown("**Obrigado!**")
-
-                    # Botão para reiniciar o formulário
-                    if st.button("🔄 Fazer nova pesquisa"):
-                        # Reset das variáveis
-                        st.session_state.ferramenta_count = 1
-
-                        for i in range(0, 100):
-                            st.session_state.pop(f"nome_{i}", None)
-                            st.session_state.pop(f"objetivo_{i}", None)
-                            st.session_state.pop(f"tipo_{i}", None)
-                            st.session_state.pop(f"categoria_{i}", None)
-                            st.session_state.pop(f"importancia_{i}", None)
-                            st.session_state.pop(f"horas_{i}", None)
-
-                        for painel in paineis_lista:
-                            st.session_state.pop(f"nota_{painel}", None)
-                            st.session_state.pop(f"comentario_{painel}", None)
-
-                        # Também limpar e-mail se quiser:
-                        st.session_state.pop("email", None)
-
-                        # Forçar recarregamento com tudo limpo
-                        st.experimental_rerun()
-
-                else:
-                    st.error("❌ Erro ao salvar a resposta no GitHub.")
+            st.markdown("**Obrigado!**")
+
+            # Botão para reiniciar o formulário (o callback limpa o estado antes da nova execução)
+            st.button("🔄 Fazer nova pesquisa", on_click=reiniciar_formulario)
+
+        else:
+            st.error("❌ Erro ao salvar a resposta.")
 
 
@@ -0,0 +1,864 @@
+import io
+import os
+import gzip
+import json
+import time
+import uuid
+import queue
+import random
+import base64
+import threading
+import sqlite3
+import requests
+from requests.adapters import HTTPAdapter
+import pandas as pd
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import Future
+from metricas import metricas, configurar_log, descarregar_log
+from esquema_resposta import (COL_VERSAO, COL_ID, COL_EMAIL, COL_DATA, COL_PAINEIS, COL_FERRAMENTAS,
+                              resposta_para_linha)
+from indice_respostas import MODOS_ENVIO, chave_email, ultimas_respostas, atuais_do_lote
+
+# Pasta onde cada envio é gravado como um segmento JSONL independente (comprimido com gzip).
+# O job de compactação junta os segmentos em um arquivo por dia (subpasta diarios) e
+# reconstrói a planilha consolidada; cada envio grava só o próprio segmento, de tamanho constante.
+PASTA_RESPOSTAS = 'respostas'
+LOG_FILE = 'armazenamento_log.txt'
+PASTA_DIARIOS = 'diarios'
+EXTENSAO_SEGMENTO = '.jsonl.gz'
+EXTENSOES_SEGMENTO = ('.jsonl', '.jsonl.gz')  # segmentos antigos não eram comprimidos
+
+logger = configurar_log(LOG_FILE, 'armazenamento')
+
+
+def serializar_respostas(respostas):
+    """
+    Converte uma lista de respostas (dicionários) em linhas JSONL.
+    """
+    return ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in respostas)
+
+
+def desserializar_respostas(texto):
+    """
+    Converte o conteúdo de um segmento JSONL de volta em uma lista de respostas.
+    """
+    return [json.loads(linha) for linha in texto.splitlines() if linha.strip()]
+
+
+def comprimir_respostas(respostas):
+    """
+    Conteúdo de um segmento: JSONL comprimido com gzip (mtime fixo, para o mesmo lote gerar os mesmos bytes).
+    """
+    return gzip.compress(serializar_respostas(respostas).encode('utf-8'), mtime=0)
+
+
+def ler_segmento(caminho):
+    """
+    Lê um segmento (comprimido ou não, pela extensão) e retorna as respostas.
+    """
+    abrir = gzip.open if caminho.endswith('.gz') else open
+    with abrir(caminho, 'rt', encoding='utf-8') as f:
+        return desserializar_respostas(f.read())
+
+
+def nome_segmento(momento=None):
+    """
+    Gera um nome de segmento único e ordenável cronologicamente.
+    """
+    momento = momento or datetime.now()
+    return f"{momento:%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}{EXTENSAO_SEGMENTO}"
+
+
+def listar_segmentos(pasta=PASTA_RESPOSTAS):
+    """
+    Lista os segmentos locais em ordem cronológica (o nome começa com data/hora).
+    """
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if nome.endswith(EXTENSOES_SEGMENTO)
+    )
+
+
+def listar_diarios(pasta=PASTA_RESPOSTAS):
+    """
+    Lista os arquivos diários (AAAAMMDD.jsonl.gz) em ordem cronológica.
+    """
+    return listar_segmentos(os.path.join(pasta, PASTA_DIARIOS))
+
+
+def anexar_resposta_local(resposta, pasta=PASTA_RESPOSTAS):
+    """
+    Grava uma resposta como um novo segmento local, sem tocar na planilha consolidada.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, nome_segmento())
+    with open(caminho, 'wb') as f:
+        f.write(comprimir_respostas([resposta]))
+    return caminho
+
+
+def ler_segmentos(caminhos):
+    """
+    Lê todos os segmentos informados e retorna as respostas em ordem.
+    """
+    respostas = []
+    for caminho in caminhos:
+        respostas.extend(ler_segmento(caminho))
+    return respostas
+
+
+def sem_envios_repetidos(respostas, existentes):
+    """
+    Descarta as respostas cujo ID do envio já está em existentes (ex.: compactação
+    interrompida e executada de novo). Respostas sem ID são mantidas.
+    """
+    vistos = {r.get(COL_ID) for r in existentes} - {None}
+    novas = []
+    for resposta in respostas:
+        id_envio = resposta.get(COL_ID)
+        if id_envio in vistos:
+            continue
+        if id_envio is not None:
+            vistos.add(id_envio)
+        novas.append(resposta)
+    return novas
+
+
+def consolidar_dia(dia, respostas, pasta=PASTA_RESPOSTAS):
+    """
+    Acrescenta ao arquivo diário do dia (reescrito por inteiro e trocado de uma vez) as respostas
+    que ainda não estão nele. O arquivo só cresce com os envios daquele dia.
+    Retorna as respostas realmente acrescentadas.
+    """
+    pasta_diarios = os.path.join(pasta, PASTA_DIARIOS)
+    os.makedirs(pasta_diarios, exist_ok=True)
+    caminho = os.path.join(pasta_diarios, f"{dia}{EXTENSAO_SEGMENTO}")
+    existentes = ler_segmento(caminho) if os.path.exists(caminho) else []
+    novas = sem_envios_repetidos(respostas, existentes)
+    if novas:
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(comprimir_respostas(existentes + novas))
+        os.replace(temporario, caminho)
+    return novas
+
+
+def compactar_respostas(arquivo_base='base_dados_pesquisa_PO.xlsx', pasta=PASTA_RESPOSTAS, apenas_ultimas=False):
+    """
+    Job de compactação: junta os segmentos pendentes no arquivo diário do dia de cada envio
+    (pasta/diarios/AAAAMMDD.jsonl.gz), reconstrói a planilha consolidada (snapshot) com as
+    respostas dos segmentos que ainda não estão nela e só então remove os segmentos.
+    Executar de novo após uma interrupção não duplica nem perde respostas: o arquivo diário e o
+    snapshot são conferidos cada um pelos IDs do envio que já contêm.
+    Com apenas_ultimas=True, o snapshot guarda só a resposta mais recente de cada e-mail.
+    Retorna a quantidade de respostas incorporadas.
+    """
+    segmentos = listar_segmentos(pasta)
+    if not segmentos:
+        return 0
+
+    # O nome do segmento começa com a data do envio (AAAAMMDD_...)
+    por_dia = {}
+    for caminho in segmentos:
+        por_dia.setdefault(os.path.basename(caminho)[:8], []).append(caminho)
+    pendentes = []
+    for dia, caminhos in por_dia.items():
+        respostas = ler_segmentos(caminhos)
+        consolidar_dia(dia, respostas, pasta)
+        pendentes.extend(respostas)
+
+    # O snapshot recebe todas as respostas pendentes que ele ainda não tem, mesmo que uma
+    # execução anterior interrompida já as tenha gravado no arquivo diário
+    df_existente = pd.read_excel(arquivo_base) if os.path.exists(arquivo_base) else pd.DataFrame()
+    df_novas = pd.DataFrame([resposta_para_linha(r) for r in sem_envios_repetidos(pendentes, [])])
+    if apenas_ultimas and not df_novas.empty:
+        df_novas = ultimas_respostas(df_novas)
+    if COL_ID in df_existente and COL_ID in df_novas:
+        df_novas = df_novas[~df_novas[COL_ID].isin(df_existente[COL_ID].dropna())]
+    df_total = pd.concat([df_existente, df_novas], ignore_index=True)
+    if apenas_ultimas:
+        df_total = ultimas_respostas(df_total)
+
+    # Grava em arquivo temporário e substitui de uma vez, para não perder a base em caso de falha
+    temporario = f"{arquivo_base}.tmp.xlsx"
+    df_total.to_excel(temporario, index=False)
+    os.replace(temporario, arquivo_base)
+
+    # Só remove os segmentos depois que o snapshot foi publicado
+    for caminho in segmentos:
+        os.remove(caminho)
+
+    return len(df_novas)
+
+
+# =========================== BACKENDS DE ARMAZENAMENTO ===========================
+
+@contextmanager
+def conectar_sqlite(caminho):
+    """
+    Abre uma conexão SQLite própria para o bloco: commit ao final (ou rollback em caso de erro)
+    e fechamento garantido. Cada thread usa a sua, pois o Streamlit atende sessões em threads diferentes.
+    """
+    con = sqlite3.connect(caminho, timeout=30)
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def validar_modo_envio(modo):
+    if modo not in MODOS_ENVIO:
+        raise ValueError(f"Modo de envio desconhecido: {modo} (use {', '.join(MODOS_ENVIO)})")
+    return modo
+
+
+def criar_sessao(token, conexoes=4):
+    """
+    Sessão HTTP compartilhada para a API do GitHub: reaproveita conexões (keep-alive)
+    em vez de abrir uma conexão TLS nova a cada requisição.
+    """
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    sessao.headers.update({
+        "Authorization": f"token {token}",
+        "Accept": "application/vnd.github.v3+json"
+    })
+    return sessao
+
+
+def sem_respostas_de(df, df_novo):
+    """
+    Remove da base as respostas substituídas pelos envios de df_novo (mesmo e-mail ou mesmo ID do envio).
+    """
+    substituidas = pd.Series(False, index=df.index)
+    if COL_EMAIL in df and COL_EMAIL in df_novo:
+        substituidas |= df[COL_EMAIL].map(chave_email).isin(set(df_novo[COL_EMAIL].map(chave_email).dropna()))
+    if COL_ID in df and COL_ID in df_novo:
+        substituidas |= df[COL_ID].isin(df_novo[COL_ID].dropna())
+    return df[~substituidas]
+
+
+class FalhaCarregamento(Exception):
+    """
+    A base não pôde ser lida (ex.: erro da API). Diferente de uma base vazia ou inexistente.
+    """
+
+
+class BackendArmazenamento:
+    """
+    Interface comum dos backends de armazenamento das respostas.
+    anexar() grava um envio; carregar() retorna a base completa como DataFrame.
+    """
+
+    def anexar(self, resposta):
+        raise NotImplementedError
+
+    def anexar_lote(self, respostas):
+        return all(self.anexar(r) for r in respostas)
+
+    def carregar(self):
+        raise NotImplementedError
+
+
+class BackendArquivoLocal(BackendArmazenamento):
+    """
+    Grava cada envio como um segmento JSONL comprimido em uma pasta local.
+    carregar() lê o histórico: os arquivos diários já compactados e os segmentos pendentes.
+    """
+
+    def __init__(self, pasta=PASTA_RESPOSTAS):
+        self.pasta = pasta
+
+    def anexar(self, resposta):
+        anexar_resposta_local(resposta, self.pasta)
+        return True
+
+    def carregar(self):
+        caminhos = listar_diarios(self.pasta) + listar_segmentos(self.pasta)
+        return pd.DataFrame([resposta_para_linha(r) for r in ler_segmentos(caminhos)])
+
+
+class BackendSQLite(BackendArmazenamento):
+    """
+    Grava os envios em uma tabela SQLite local, com índices por e-mail e data.
+    Cada operação abre a própria conexão, pois o Streamlit atende sessões em threads diferentes.
+    Painéis e ferramentas (versão 2) são gravados como texto JSON.
+
+    modo_envio (ver indice_respostas.py): em 'substituir', um envio apaga as respostas anteriores
+    do mesmo e-mail (ou do mesmo ID do envio); em 'versionar', elas ficam na tabela com ativa = 0.
+    A busca usa a coluna chave_email (o e-mail normalizado por chave_email, calculado em Python
+    na gravação) e o seu índice, sem varrer a tabela. carregar() devolve só as
+    respostas ativas; consultar_por_email() devolve todas as versões da pessoa.
+    """
+
+    # Colunas acrescentadas depois da criação da tabela: bancos antigos ganham as colunas na abertura
+    COLUNAS_NOVAS = {'versao': 'INTEGER', 'id_envio': 'TEXT', 'ativa': 'INTEGER NOT NULL DEFAULT 1',
+                     'chave_email': 'TEXT'}
+
+    def __init__(self, caminho='respostas.db', modo_envio='anexar'):
+        self.caminho = caminho
+        self.modo_envio = validar_modo_envio(modo_envio)
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS respostas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    email TEXT,
+                    data TEXT,
+                    paineis TEXT,
+                    ferramentas TEXT,
+                    versao INTEGER,
+                    id_envio TEXT,
+                    ativa INTEGER NOT NULL DEFAULT 1,
+                    chave_email TEXT
+                )
+            """)
+            existentes = {linha[1] for linha in con.execute("PRAGMA table_info(respostas)")}
+            for coluna, tipo in self.COLUNAS_NOVAS.items():
+                if coluna not in existentes:
+                    con.execute(f"ALTER TABLE respostas ADD COLUMN {coluna} {tipo}")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_respostas_email ON respostas (email)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_respostas_data ON respostas (data)")
+            # O índice antigo era sobre lower(trim(email)), que não normaliza como chave_email
+            # (trim do SQLite só tira espaços; lower só converte ASCII)
+            con.execute("DROP INDEX IF EXISTS idx_respostas_chave")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_respostas_chave_email ON respostas (chave_email)")
+            self._preencher_chaves(con)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_respostas_id_envio ON respostas (id_envio)")
+
+    def _conectar(self):
+        return conectar_sqlite(self.caminho)
+
+    @staticmethod
+    def _preencher_chaves(con):
+        """
+        Calcula chave_email das linhas gravadas antes da coluna existir.
+        """
+        linhas = con.execute(
+            "SELECT id, email FROM respostas WHERE chave_email IS NULL AND email IS NOT NULL"
+        ).fetchall()
+        con.executemany(
+            "UPDATE respostas SET chave_email = ? WHERE id = ?",
+            [(chave_email(email), id_linha) for id_linha, email in linhas]
+        )
+
+    def anexar(self, resposta):
+        return self.anexar_lote([resposta])
+
+    def anexar_lote(self, respostas):
+        respostas = [resposta_para_linha(r) for r in respostas]
+        # Dentro do próprio lote (a caixa de saída entrega vários envios juntos) também vale só
+        # o último de cada pessoa: em 'substituir' os anteriores nem são gravados; em 'versionar'
+        # são gravados já inativos
+        atuais = atuais_do_lote(respostas) if self.modo_envio != 'anexar' else [True] * len(respostas)
+        linhas = [
+            (r.get(COL_EMAIL), r.get(COL_DATA), r.get(COL_PAINEIS), r.get(COL_FERRAMENTAS),
+             r.get(COL_VERSAO), r.get(COL_ID), int(atual), chave_email(r.get(COL_EMAIL)))
+            for r, atual in zip(respostas, atuais)
+            if atual or self.modo_envio != 'substituir'
+        ]
+        with self._conectar() as con:
+            if self.modo_envio != 'anexar':
+                self._retirar_anteriores(con, linhas)
+            con.executemany(
+                "INSERT INTO respostas (email, data, paineis, ferramentas, versao, id_envio, ativa, chave_email) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                linhas
+            )
+        return True
+
+    def _retirar_anteriores(self, con, linhas):
+        """
+        Apaga ('substituir') ou desativa ('versionar') as respostas ativas que os envios substituem.
+        """
+        if self.modo_envio == 'substituir':
+            comando = "DELETE FROM respostas"
+        else:
+            comando = "UPDATE respostas SET ativa = 0"
+        con.executemany(
+            f"{comando} WHERE (chave_email = ? OR id_envio = ?) AND ativa = 1",
+            [(chave, id_envio) for _, _, _, _, _, id_envio, _, chave in linhas]
+        )
+
+    def _consultar(self, where='', parametros=()):
+        with self._conectar() as con:
+            df = pd.read_sql_query(
+                f"SELECT versao, id_envio, email, data, paineis, ferramentas FROM respostas {where} ORDER BY id",
+                con, params=parametros
+            )
+        return df.rename(columns={
+            'versao': COL_VERSAO, 'id_envio': COL_ID, 'email': COL_EMAIL, 'data': COL_DATA,
+            'paineis': COL_PAINEIS, 'ferramentas': COL_FERRAMENTAS
+        })
+
+    def carregar(self):
+        return self._consultar("WHERE ativa = 1")
+
+    def consultar_por_email(self, email):
+        return self._consultar("WHERE chave_email = ?", (chave_email(email),))
+
+
+class BackendGitHub(BackendArmazenamento):
+    """
+    Usa a API de conteúdos do GitHub: cada envio vira um segmento (JSONL comprimido) na pasta de respostas
+    e a planilha consolidada (snapshot) é lida/gravada com controle por sha.
+    api_url pode apontar para um servidor local (ver github_local.py) para testes offline.
+    A planilha lida fica em cache por ttl_cache segundos; toda gravação bem-sucedida ou
+    conflito de sha invalida o cache. Depois disso, a leitura é condicional (If-None-Match com
+    o ETag da última resposta): se a planilha não mudou, a API responde 304 sem conteúdo e a
+    cópia em cache (do mesmo sha) é reaproveitada.
+    No modo 'planilha' com modo_envio = 'substituir', o envio remove da planilha as respostas
+    anteriores do mesmo e-mail; nos segmentos (e em 'versionar') as versões anteriores ficam
+    gravadas e o tratamento com apenas_ultimas usa só a mais recente.
+    """
+
+    # Status devolvidos pela API quando o sha enviado não é mais o atual
+    STATUS_CONFLITO = (409, 422)
+
+    def __init__(self, token, usuario, repo, branch, file_path,
+                 pasta=PASTA_RESPOSTAS, api_url='https://api.github.com',
+                 modo='segmentos', tentativas=5, espera_inicial=0.2, ttl_cache=60.0,
+                 timeout=(5, 30), conexoes=4, modo_envio='anexar'):
+        self.usuario = usuario
+        self.repo = repo
+        self.branch = branch
+        self.file_path = file_path
+        self.pasta = pasta
+        self.api_url = api_url.rstrip('/')
+        self.modo = modo  # 'segmentos' (um arquivo por lote) ou 'planilha' (reescreve o snapshot)
+        self.modo_envio = validar_modo_envio(modo_envio)
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        # (conexão, leitura) em segundos; nos secrets (TOML) chega como lista
+        self.timeout = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+        self.sessao = criar_sessao(token, conexoes)
+        self.ttl_cache = ttl_cache
+        self._cache = None  # (momento da validação ou None, ETag, DataFrame, sha)
+        self._trava_cache = threading.Lock()
+
+    def _url(self, caminho):
+        return f"{self.api_url}/repos/{self.usuario}/{self.repo}/contents/{caminho}"
+
+    def _requisitar(self, metodo, url, **kwargs):
+        """
+        Faz a chamada pela sessão compartilhada e registra latência e status nas métricas.
+        """
+        inicio, status = time.perf_counter(), None
+        try:
+            resposta = self.sessao.request(metodo, url, timeout=self.timeout, **kwargs)
+            status = resposta.status_code
+            return resposta
+        finally:
+            metricas.registrar_chamada_github(metodo, status, time.perf_counter() - inicio)
+
+    def carregar_planilha(self, usar_cache=True):
+        """
+        Retorna (DataFrame, sha) da planilha consolidada ou (DataFrame vazio, None) se ela não existe.
+        Dentro do ttl_cache, devolve uma cópia da última leitura sem acessar a API.
+        Levanta FalhaCarregamento se a API responder com erro.
+        """
+        with self._trava_cache:
+            cache = self._cache
+        if usar_cache and cache and cache[0] is not None and time.monotonic() - cache[0] < self.ttl_cache:
+            return cache[2].copy(), cache[3]
+
+        cabecalhos = {"If-None-Match": cache[1]} if cache and cache[1] else {}
+        r = self._requisitar("GET", f"{self._url(self.file_path)}?ref={self.branch}", headers=cabecalhos)
+        if r.status_code == 304 and cache:
+            _, etag, df, sha = cache
+        elif r.status_code == 200:
+            content = base64.b64decode(r.json()["content"])
+            etag, df, sha = r.headers.get("ETag"), pd.read_excel(io.BytesIO(content)), r.json()["sha"]
+        elif r.status_code == 404:
+            return pd.DataFrame(), None
+        else:
+            raise FalhaCarregamento(f"Erro ao ler {self.file_path} do GitHub: HTTP {r.status_code}")
+        with self._trava_cache:
+            self._cache = (time.monotonic(), etag, df, sha)
+        return df.copy(), sha
+
+    def invalidar_cache(self):
+        """
+        Força a próxima leitura a consultar a API (condicionalmente, pelo ETag).
+        """
+        with self._trava_cache:
+            if self._cache:
+                self._cache = (None,) + self._cache[1:]
+
+    def _put(self, caminho, conteudo, mensagem, sha=None):
+        data = {
+            "message": mensagem,
+            "content": base64.b64encode(conteudo).decode("utf-8"),
+            "branch": self.branch
+        }
+        if sha:
+            data["sha"] = sha
+        response = self._requisitar("PUT", self._url(caminho), data=json.dumps(data))
+        return response.status_code
+
+    def _esperar(self, tentativa):
+        # Backoff exponencial com jitter, para que envios simultâneos não colidam de novo
+        time.sleep(self.espera_inicial * (2 ** tentativa) * (0.5 + random.random()))
+
+    def salvar_planilha(self, df, sha):
+        output = io.BytesIO()
+        df.to_excel(output, index=False)
+        status = self._put(self.file_path, output.getvalue(),
+                           "Atualizando base de dados da pesquisa via Streamlit", sha)
+        self.invalidar_cache()
+        return status in [200, 201]
+
+    def atualizar_planilha(self, transformar):
+        """
+        Lê a planilha, aplica transformar(df) e grava com o sha lido.
+        Se outro envio gravou antes (conflito de sha), relê e tenta de novo com backoff.
+        """
+        for tentativa in range(self.tentativas):
+            try:
+                df, sha = self.carregar_planilha()
+            except FalhaCarregamento:
+                return False
+            if sha is None:
+                return False
+            output = io.BytesIO()
+            transformar(df).to_excel(output, index=False)
+            status = self._put(self.file_path, output.getvalue(),
+                               "Atualizando base de dados da pesquisa via Streamlit", sha)
+            # Depois de gravar (ou de perder a disputa pelo sha) a cópia em cache está velha
+            self.invalidar_cache()
+            if status in [200, 201]:
+                return True
+            if status not in self.STATUS_CONFLITO:
+                return False
+            self._esperar(tentativa)
+        return False
+
+    def anexar(self, resposta):
+        return self.anexar_lote([resposta])
+
+    def anexar_lote(self, respostas):
+        if self.modo == 'planilha':
+            df_novo = pd.DataFrame([resposta_para_linha(r) for r in respostas])
+            if self.modo_envio == 'substituir':
+                # Vários envios da mesma pessoa no mesmo lote: fica só o último
+                df_novo = df_novo[atuais_do_lote(respostas)].reset_index(drop=True)
+                return self.atualizar_planilha(lambda df: pd.concat([sem_respostas_de(df, df_novo), df_novo],
+                                                                    ignore_index=True))
+            return self.atualizar_planilha(lambda df: pd.concat([df, df_novo], ignore_index=True))
+
+        conteudo = comprimir_respostas(respostas)
+        for tentativa in range(self.tentativas):
+            # Um nome novo a cada tentativa: o segmento nunca sobrescreve outro envio
+            status = self._put(f"{self.pasta}/{nome_segmento()}", conteudo,
+                               "Nova resposta da pesquisa via Streamlit")
+            if status in [200, 201]:
+                return True
+            if status not in self.STATUS_CONFLITO:
+                return False
+            self._esperar(tentativa)
+        return False
+
+    def carregar(self):
+        df, _ = self.carregar_planilha()
+        return df
+
+
+class BackendEspelhado(BackendArmazenamento):
+    """
+    Grava no backend primário (ex.: SQLite local) e replica cada envio no espelho
+    (ex.: GitHub) de forma assíncrona, sem bloquear quem enviou.
+    A réplica passa por uma caixa de saída própria (fila_espelho, SQLite): se o espelho
+    recusar ou falhar, o envio fica pendente e é reenviado com backoff, inclusive após reiniciar.
+    """
+
+    def __init__(self, primario, espelho, fila_espelho='espelho_saida.db'):
+        self.primario = primario
+        self.espelho = espelho
+        self.fila = caixa_compartilhada(espelho, fila_espelho, nome='espelho')
+
+    def anexar(self, resposta):
+        return self.anexar_lote([resposta])
+
+    def anexar_lote(self, respostas):
+        sucesso = self.primario.anexar_lote(respostas)
+        if sucesso:
+            for resposta in respostas:
+                self.fila.enviar(resposta)
+        return sucesso
+
+    def carregar(self):
+        return self.primario.carregar()
+
+
+def criar_backend(config):
+    """
+    Monta o backend a partir da configuração (st.secrets ou dicionário equivalente).
+
+    [armazenamento]
+    backend = "github" | "sqlite" | "local"   # padrão: "github"
+    caminho = "respostas.db"                  # sqlite: arquivo; local: pasta
+    espelho_github = true                     # replica no GitHub em segundo plano
+    fila_espelho = "espelho_saida.db"         # pendências da réplica (reenviadas até entregar)
+    modo_envio = "anexar" | "substituir" | "versionar"   # reenvio do mesmo e-mail
+    """
+    opcoes = config.get("armazenamento", {})
+    tipo = opcoes.get("backend", "github")
+    modo_envio = opcoes.get("modo_envio", "anexar")
+
+    github = None
+    if "github" in config:
+        gh = config["github"]
+        github = BackendGitHub(
+            gh["token"], gh["username"], gh["repo"], gh["branch"], gh["file_path"],
+            pasta=gh.get("pasta_respostas", PASTA_RESPOSTAS),
+            api_url=gh.get("api_url", "https://api.github.com"),
+            modo=gh.get("modo", "segmentos"),
+            ttl_cache=gh.get("ttl_cache", 60.0),
+            timeout=gh.get("timeout", (5, 30)),
+            modo_envio=modo_envio
+        )
+
+    if tipo == "github":
+        if github is None:
+            raise ValueError("Backend 'github' requer a seção [github] na configuração")
+        return github
+    elif tipo == "sqlite":
+        backend = BackendSQLite(opcoes.get("caminho", "respostas.db"), modo_envio)
+    elif tipo == "local":
+        backend = BackendArquivoLocal(opcoes.get("caminho", PASTA_RESPOSTAS))
+    else:
+        raise ValueError(f"Backend de armazenamento desconhecido: {tipo}")
+
+    if opcoes.get("espelho_github", False) and github is not None:
+        return BackendEspelhado(backend, github, opcoes.get("fila_espelho", "espelho_saida.db"))
+    return backend
+
+
+# =========================== FILA DE ENVIO ===========================
+
+class FilaEnvio:
+    """
+    Agrupa as respostas que chegam dentro de uma janela curta e grava todas
+    em uma única operação do backend (um commit no GitHub por lote).
+    Uma única thread consome a fila, então envios simultâneos não disputam o mesmo sha.
+    """
+
+    def __init__(self, backend, janela=1.0, tamanho_maximo=50):
+        self.backend = backend
+        self.janela = janela
+        self.tamanho_maximo = tamanho_maximo
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._trabalhar, name='fila-envio', daemon=True)
+        self._thread.start()
+
+    def enviar(self, resposta):
+        """
+        Enfileira a resposta e retorna um Future com o resultado (True/False) da gravação.
+        """
+        futuro = Future()
+        self._fila.put((resposta, futuro))
+        return futuro
+
+    def _coletar_lote(self):
+        lote = [self._fila.get()]
+        limite = time.monotonic() + self.janela
+        while len(lote) < self.tamanho_maximo:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _trabalhar(self):
+        while True:
+            lote = self._coletar_lote()
+            try:
+                sucesso = self.backend.anexar_lote([resposta for resposta, _ in lote])
+            except Exception as e:
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+                continue
+            for _, futuro in lote:
+                futuro.set_result(sucesso)
+
+
+# =========================== CAIXA DE SAÍDA ===========================
+
+class CaixaSaida:
+    """
+    Caixa de saída durável: cada envio é gravado em uma tabela SQLite local (uma gravação
+    de milissegundos) e confirmado na hora; uma thread em segundo plano entrega os pendentes
+    ao backend em lotes. Se a entrega falhar (ex.: GitHub fora do ar) ou o app reiniciar,
+    os envios continuam na tabela e são reenviados com backoff até serem entregues.
+    nome identifica a caixa nas métricas e no log ('caixa_saida' para o formulário,
+    'espelho' para a réplica do BackendEspelhado).
+    """
+
+    PENDENTE = 'pendente'
+    ENVIANDO = 'enviando'
+    ENTREGUE = 'entregue'
+
+    def __init__(self, backend, caminho='caixa_saida.db', janela=1.0, tamanho_maximo=50,
+                 espera_inicial=2.0, espera_maxima=300.0, nome='caixa_saida'):
+        self.backend = backend
+        self.nome = nome
+        # A caixa do formulário mantém os nomes de métricas originais
+        self.prefixo = '' if nome == 'caixa_saida' else f'{nome}_'
+
+        self.caminho = caminho
+        self.janela = janela
+        self.tamanho_maximo = tamanho_maximo
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        with conectar_sqlite(self.caminho) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS envios (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id_envio TEXT UNIQUE,
+                    resposta TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    erro TEXT,
+                    criado_em TEXT,
+                    entregue_em TEXT
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_envios_status ON envios (status, id)")
+            # Lotes que estavam em entrega quando o app parou voltam a ficar pendentes
+            con.execute("UPDATE envios SET status = ? WHERE status = ?", (self.PENDENTE, self.ENVIANDO))
+        self._evento = threading.Event()
+        self._evento.set()  # entrega o que ficou pendente de uma execução anterior
+        self._thread = threading.Thread(target=self._trabalhar, name=nome, daemon=True)
+        self._thread.start()
+
+    def enviar(self, resposta):
+        """
+        Grava a resposta na caixa de saída e retorna o ID do envio (para consultar a situação).
+        Reenviar o mesmo ID não duplica a resposta.
+        """
+        id_envio = resposta.get(COL_ID) or uuid.uuid4().hex
+        resposta = dict(resposta, **{COL_ID: id_envio})
+        metricas.contar(f'{self.prefixo}envios_recebidos')
+        with metricas.etapa(f'{self.nome}_gravacao'), conectar_sqlite(self.caminho) as con:
+            con.execute(
+                "INSERT OR IGNORE INTO envios (id_envio, resposta, status, criado_em) VALUES (?, ?, ?, ?)",
+                (id_envio, json.dumps(resposta, ensure_ascii=False), self.PENDENTE,
+                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+        self._evento.set()
+        return id_envio
+
+    def situacao(self, id_envio):
+        """
+        Retorna {'status', 'tentativas', 'erro', 'entregue_em'} do envio, ou None se não existir.
+        """
+        with conectar_sqlite(self.caminho) as con:
+            linha = con.execute(
+                "SELECT status, tentativas, erro, entregue_em FROM envios WHERE id_envio = ?", (id_envio,)
+            ).fetchone()
+        if linha is None:
+            return None
+        return dict(zip(('status', 'tentativas', 'erro', 'entregue_em'), linha))
+
+    def pendentes(self):
+        with conectar_sqlite(self.caminho) as con:
+            return con.execute(
+                "SELECT COUNT(*) FROM envios WHERE status IN (?, ?)", (self.PENDENTE, self.ENVIANDO)
+            ).fetchone()[0]
+
+    def _proximo_lote(self):
+        """
+        Reserva (status 'enviando') e retorna o próximo lote de pendentes, em uma única instrução:
+        outra thread ou processo na mesma caixa não pega as mesmas linhas.
+        """
+        with conectar_sqlite(self.caminho) as con:
+            lote = con.execute(
+                """
+                UPDATE envios SET status = ?
+                WHERE id IN (SELECT id FROM envios WHERE status = ? ORDER BY id LIMIT ?)
+                RETURNING id, resposta
+                """,
+                (self.ENVIANDO, self.PENDENTE, self.tamanho_maximo)
+            ).fetchall()
+        return sorted(lote)
+
+    def _registrar_resultado(self, ids, sucesso, erro=None):
+        marcadores = ','.join('?' * len(ids))
+        with conectar_sqlite(self.caminho) as con:
+            if sucesso:
+                con.execute(
+                    f"UPDATE envios SET status = ?, erro = NULL, entregue_em = ? WHERE id IN ({marcadores})",
+                    [self.ENTREGUE, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), *ids]
+                )
+            else:
+                con.execute(
+                    f"UPDATE envios SET status = ?, tentativas = tentativas + 1, erro = ? "
+                    f"WHERE status = ? AND id IN ({marcadores})",
+                    [self.PENDENTE, erro, self.ENVIANDO, *ids]
+                )
+
+    def _entregar_pendentes(self):
+        """
+        Entrega os pendentes em lotes, do mais antigo ao mais novo. Retorna False se um lote falhou.
+        """
+        while True:
+            lote = self._proximo_lote()
+            if not lote:
+                return True
+            ids = [id_linha for id_linha, _ in lote]
+            try:
+                with metricas.etapa(f'{self.prefixo}entrega_lote'):
+                    sucesso = self.backend.anexar_lote([json.loads(resposta) for _, resposta in lote])
+                erro = None if sucesso else "Gravação recusada pelo backend"
+            except Exception as e:
+                sucesso, erro = False, str(e)
+            self._registrar_resultado(ids, sucesso, erro)
+            metricas.contar(f"{self.prefixo}{'envios_entregues' if sucesso else 'falhas_entrega'}", len(ids))
+            if not sucesso:
+                logger.warning(f"Falha na entrega de {len(ids)} envio(s) ({self.nome}): {erro}")
+                return False
+
+    def _trabalhar(self):
+        falhas = 0
+        while True:
+            # Sem falhas, espera um novo envio; com falhas, tenta de novo após o backoff
+            espera = min(self.espera_inicial * 2 ** min(falhas - 1, 16), self.espera_maxima) if falhas else None
+            self._evento.wait(espera)
+            self._evento.clear()
+            time.sleep(self.janela)  # agrupa os envios que chegam juntos em um único lote
+            try:
+                falhas = 0 if self._entregar_pendentes() else falhas + 1
+            except Exception:
+                falhas += 1  # ex.: banco local bloqueado; tenta de novo no próximo ciclo
+            try:
+                metricas.salvar()
+                descarregar_log('armazenamento')
+            except OSError:
+                pass  # métricas e log são só informativos; não interrompem a entrega
+
+
+_caixas = {}
+_caixas_lock = threading.Lock()
+
+
+def caixa_compartilhada(backend, caminho, **opcoes):
+    """
+    Uma única CaixaSaida (e uma única thread de entrega) por arquivo no processo: o
+    formulário e a página de análises criam backends próprios, mas a réplica do espelho
+    passa pela mesma caixa. Se a caixa já existe, o backend recebido é ignorado.
+    """
+    chave = os.path.abspath(caminho)
+    with _caixas_lock:
+        if chave not in _caixas:
+            _caixas[chave] = CaixaSaida(backend, caminho=caminho, **opcoes)
+        return _caixas[chave]
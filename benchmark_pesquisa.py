@@ -0,0 +1,488 @@
+import io
+import os
+import re
+import sys
+import time
+import json
+import random
+import platform
+import tempfile
+import threading
+import contextlib
+import pandas as pd
+from datetime import datetime, timedelta
+from parser_paineis import InfoPainel, parse_paineis, parse_painel, parse_paineis_lote, extrair_paineis_coluna
+import tratamento_pesquisa
+import tratamento_respostas
+from tratamento_pesquisa import tratar_base_em_blocos, salvar_parquet, caminho_parquet
+from tratamento_respostas import tratar_dataframe
+from leitura_base import ler_parquet
+from esquema_resposta import montar_resposta, resposta_para_linha, COL_EMAIL, COL_DATA, COL_PAINEIS, COL_FERRAMENTAS
+from armazenamento import BackendGitHub, FilaEnvio, CaixaSaida
+from github_local import iniciar_servidor
+
+# Benchmark do tratamento da base: gera uma base sintética com o mesmo formato do app
+# e compara o tratamento vetorizado com o antigo (linha a linha).
+#   python benchmark_pesquisa.py [quantidade_de_respostas]
+#   python benchmark_pesquisa.py paineis [quantidade_de_respostas]   # micro-benchmark do parser de painéis
+#   python benchmark_pesquisa.py verificar [planilha]                # confere o parser com a base real
+#   python benchmark_pesquisa.py suite [tamanhos...]                 # suíte completa (padrão: 1000 10000 100000)
+#   python benchmark_pesquisa.py envios [usuarios] [envios_por_usuario]  # envios simultâneos no GitHub local
+# A suíte e a simulação de envios gravam os tempos em benchmark_resultados.jsonl e comparam
+# cada etapa com a execução anterior (mesma etapa e tamanho), apontando regressões.
+
+ARQUIVO_RESULTADOS = 'benchmark_resultados.jsonl'
+TAMANHOS_SUITE = [1_000, 10_000, 100_000]
+# Uma etapa é considerada regressão se ficar mais de 30% (e mais de 50 ms) mais lenta que na execução anterior
+TOLERANCIA_REGRESSAO = 0.30
+
+PAINEIS = [
+    "Painel Análises Forecast de Produção - PLNESROBR009",
+    "Painel do Portifólio - Planejamento da Produção - PLNESROBR004",
+    "Painel Operações - Planejamento e Controle - PLNESROBR010",
+    "PAP - Dossiê",
+    "Painel Cockpit Produção - ENGPDC010",
+    "Painel Custos Produção - ENGPDC009",
+    "Painel Qualidade - ENGPDC007",
+]
+TIPOS = ["Power BI", "Excel", "Report e-mail", "Power Point", "Python", "SAP BO + Excel", "BIG + Excel", "Outra"]
+CATEGORIAS = ["AUXÍLIO REGIONAL", "AMP X PLS", "PROJECT", "ESTOQUE", "MOP/EMP", "CUSTOS", "REPLAN", "OUTROS"]
+IMPORTANCIAS = ["💎 Muito Importante", "🪙 Importante", "🟢 Pouco Importante", "🟠 Não Importante"]
+
+
+def gerar_base_sintetica(quantidade, semente=42, formato='legado'):
+    """
+    Gera uma base bruta com o mix de painéis e ferramentas do formulário.
+    formato='legado': como o app.py gravava antes da versão 2 (painéis como repr de dicionário
+    e ferramentas como JSON), com ~2% de ferramentas no formato antigo separado por vírgulas.
+    formato='v2': registros estruturados (esquema_resposta), como o app grava hoje.
+    """
+    aleatorio = random.Random(semente)
+    inicio = datetime(2025, 5, 19)
+    linhas = []
+    for i in range(quantidade):
+        paineis = {
+            painel: {"comentario": aleatorio.choice(["", "Ótimo painel.", "Trazer visão por regional"]),
+                     "nota": aleatorio.randint(0, 10)}
+            for painel in aleatorio.sample(PAINEIS, aleatorio.randint(0, 4))
+        }
+        ferramentas = []
+        for j in range(aleatorio.randint(1, 4)):
+            ferramenta = {
+                "Nome": f"Ferramenta {i}-{j}",
+                "Objetivo": "Acompanhamento das metas mensais",
+                "Tipo": aleatorio.choice(TIPOS),
+                "Categoria": aleatorio.choice(CATEGORIAS),
+                "Importância": aleatorio.choice(IMPORTANCIAS),
+                "Horas": float(aleatorio.randint(1, 40)),
+            }
+            if formato == 'v2':
+                ferramentas.append(ferramenta)
+            elif aleatorio.random() < 0.02:
+                ferramentas.append(",".join(str(v) for v in ferramenta.values()))
+            else:
+                ferramentas.append(json.dumps(ferramenta, ensure_ascii=False))
+        email = f"usuario{i % 500}@mrv.com.br"
+        data = (inicio + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")
+        if formato == 'v2':
+            linhas.append(resposta_para_linha(montar_resposta(email, paineis, ferramentas, data, f"{i:032x}")))
+            continue
+        linhas.append({
+            COL_EMAIL: email,
+            COL_DATA: data,
+            COL_PAINEIS: "; ".join(f"{k}: {v}" for k, v in paineis.items()),
+            COL_FERRAMENTAS: "; ".join(ferramentas),
+        })
+    return pd.DataFrame(linhas)
+
+
+def extrair_info_painel_antigo(texto):
+    """
+    Parser anterior de um item de painel (split + duas regex não compiladas), mantido como referência.
+    """
+    nome = texto.split(':')[0].strip()
+    comentario = None
+    nota = None
+    comentario_match = re.search(r"\{'comentario':\s*'(.*?)'", texto)
+    if comentario_match:
+        comentario = comentario_match.group(1).strip()
+    nota_match = re.search(r"'nota':\s*([0-9\.]+)", texto)
+    if nota_match:
+        nota = nota_match.group(1).strip()
+    return nome, comentario, nota
+
+
+def tratar_linha_a_linha(df):
+    """
+    Implementação anterior (iterrows + json.loads por item), mantida como referência.
+    """
+    registros = []
+    for _, row in df.iterrows():
+        for painel_item in str(row.get(COL_PAINEIS, '')).split(';'):
+            if painel_item.strip() == '':
+                continue
+            nome, comentario, nota = extrair_info_painel_antigo(painel_item)
+            registros.append({'E-mail': row[COL_EMAIL], 'Data': row[COL_DATA], 'Tipo': 'Painel',
+                              'Nome': nome, 'Comentário': comentario, 'Nota': nota})
+        for ferramenta_item in str(row.get(COL_FERRAMENTAS, '')).split(';'):
+            ferramenta_item = ferramenta_item.strip()
+            if ferramenta_item == '':
+                continue
+            try:
+                f_partes = json.loads(ferramenta_item)
+            except json.JSONDecodeError:
+                continue
+            registros.append({'E-mail': row[COL_EMAIL], 'Data': row[COL_DATA], 'Tipo': 'Ferramenta',
+                              'Ferramenta - Nome': f_partes.get('Nome', ''),
+                              'Ferramenta - Horas gastas mensais': f_partes.get('Horas', '')})
+    return pd.DataFrame(registros)
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+@contextlib.contextmanager
+def silenciar():
+    """
+    Silencia as mensagens e o log do tratamento (avisos de JSON inválido são esperados
+    na base sintética) para que não entrem na medição.
+    """
+    registrar_log = tratamento_pesquisa.registrar_log
+    desabilitado = tratamento_respostas.logger.disabled
+    tratamento_pesquisa.registrar_log = lambda mensagem, nivel=None: None
+    tratamento_respostas.logger.disabled = True
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        tratamento_pesquisa.registrar_log = registrar_log
+        tratamento_respostas.logger.disabled = desabilitado
+
+
+def silenciado(funcao):
+    def executar(*args):
+        with silenciar():
+            return funcao(*args)
+    return executar
+
+
+def benchmark_tratamento(quantidade):
+    print(f"🧪 Gerando base sintética com {quantidade} respostas...")
+    df = gerar_base_sintetica(quantidade)
+
+    with silenciar():
+        df_antigo, tempo_antigo = cronometrar(tratar_linha_a_linha, df)
+        df_novo, tempo_novo = cronometrar(tratar_dataframe, df)
+
+    print(f"⏱️ Linha a linha: {tempo_antigo:.2f}s ({len(df_antigo)} registros)")
+    print(f"⏱️ Vetorizado:    {tempo_novo:.2f}s ({len(df_novo)} registros)")
+    print(f"🚀 Ganho: {tempo_antigo / tempo_novo:.1f}x")
+
+
+def benchmark_paineis(quantidade):
+    celulas = gerar_base_sintetica(quantidade)[COL_PAINEIS]
+    print(f"🧪 {len(celulas)} células")
+
+    _, tempo_antigo = cronometrar(lambda: [
+        [extrair_info_painel_antigo(item) for item in celula.split(';') if item.strip()] for celula in celulas
+    ])
+    _, tempo_lote = cronometrar(parse_paineis_lote, celulas)
+    _, tempo_coluna = cronometrar(extrair_paineis_coluna, celulas)
+
+    print(f"⏱️ split + extrair_info_painel antigo: {tempo_antigo:.3f}s")
+    print(f"⏱️ parse_paineis_lote:                 {tempo_lote:.3f}s")
+    print(f"⏱️ extrair_paineis_coluna (DataFrame): {tempo_coluna:.3f}s")
+
+
+# Casos com o resultado esperado escrito à mão. As células vêm da base real (linhas 85/86:
+# comentário com ';'; linhas 116/117: comentário entre aspas duplas, com apóstrofo; linha 12:
+# comentário livre; linha 19: comentários livres vazios), menos o item sem ':', que não
+# aparece na base. Os comentários saem sem espaços nas pontas.
+CASOS_PAINEIS = [
+    (
+        "Painel Análises Forecast de Produção - PLNESROBR009: {'comentario': '', 'nota': 10}; "
+        "Painel do Portifólio - Planejamento da Produção - PLNESROBR004: {'comentario': '', 'nota': 9}; "
+        "Painel Operações - Planejamento e Controle - PLNESROBR010: {'comentario': 'melhorar atualização; "
+        "muita informação no mesmo visual, poluído. ', 'nota': 7}",
+        [
+            InfoPainel('Painel Análises Forecast de Produção - PLNESROBR009', '', 10.0),
+            InfoPainel('Painel do Portifólio - Planejamento da Produção - PLNESROBR004', '', 9.0),
+            InfoPainel('Painel Operações - Planejamento e Controle - PLNESROBR010',
+                       'melhorar atualização; muita informação no mesmo visual, poluído.', 7.0),
+        ],
+    ),
+    (
+        "Painel Análises Forecast de Produção - PLNESROBR009: {'comentario': '', 'nota': 10}; "
+        "PAP - Dossiê: {'comentario': \"Gostaria de ver a abertura dos VP's% por atividades, do que foi "
+        "considerado na versão da época do project. \", 'nota': 9}",
+        [
+            InfoPainel('Painel Análises Forecast de Produção - PLNESROBR009', '', 10.0),
+            InfoPainel('PAP - Dossiê', "Gostaria de ver a abertura dos VP's% por atividades, do que foi "
+                                       "considerado na versão da época do project.", 9.0),
+        ],
+    ),
+    (
+        "Painel do Portifólio - Planejamento da Produção - PLNESROBR004: Comentário Painel 1\n; "
+        "Painel Produção Produtividade e MO - PLNESROBR005: Comentário Painel 2",
+        [
+            InfoPainel('Painel do Portifólio - Planejamento da Produção - PLNESROBR004', 'Comentário Painel 1', None),
+            InfoPainel('Painel Produção Produtividade e MO - PLNESROBR005', 'Comentário Painel 2', None),
+        ],
+    ),
+    (
+        "Painel Análises Forecast de Produção - PLNESROBR009: ; PAP - Dossiê: ",
+        [
+            InfoPainel('Painel Análises Forecast de Produção - PLNESROBR009', None, None),
+            InfoPainel('PAP - Dossiê', None, None),
+        ],
+    ),
+    (
+        "Painel de Materiais - ENGPDC005; PAP - Dossiê: {'comentario': 'ok', 'nota': 8}",
+        [
+            InfoPainel('Painel de Materiais - ENGPDC005', None, None),
+            InfoPainel('PAP - Dossiê', 'ok', 8.0),
+        ],
+    ),
+]
+
+
+def verificar_casos_paineis():
+    """
+    Confere parse_paineis e parse_painel com os CASOS_PAINEIS. Retorna o número de divergências.
+    """
+    divergencias = 0
+    for celula, esperado in CASOS_PAINEIS:
+        obtido = parse_paineis(celula)
+        if obtido != esperado:
+            divergencias += 1
+            print(f"❌ {celula[:60]!r}...: esperado={esperado} obtido={obtido}")
+        # Item a item, parse_painel deve concordar (itens sem ';' dentro do comentário)
+        if ';' not in ''.join(info.comentario or '' for info in esperado):
+            for item, info in zip(celula.split(';'), esperado):
+                if parse_painel(item) != info:
+                    divergencias += 1
+                    print(f"❌ parse_painel({item!r}) = {parse_painel(item)}, esperado {info}")
+    return divergencias
+
+
+def verificar_paineis(arquivo='base_dados_pesquisa_PO.xlsx'):
+    """
+    Confere o parser novo: primeiro com os CASOS_PAINEIS (resultado esperado fixo, incluindo
+    os formatos que o parser antigo não tratava); depois com todas as células reais da base,
+    em que a versão em lote e a versão em DataFrame devem concordar entre si e com o parser
+    antigo nos itens em que ele funcionava (comentário entre aspas simples e sem ';' dentro).
+    """
+    divergencias = verificar_casos_paineis()
+    print(f"{'✅' if not divergencias else '❌'} {len(CASOS_PAINEIS)} casos com resultado esperado, "
+          f"{divergencias} divergência(s)")
+
+    celulas = pd.read_excel(arquivo)[COL_PAINEIS].dropna()
+    coluna = extrair_paineis_coluna(celulas)
+    esperados = [(linha,) + tuple(info) for linha, celula in celulas.items() for info in parse_paineis(celula)]
+    obtidos = [tuple(None if pd.isna(v) else v for v in linha) for linha in coluna.itertuples(index=False)]
+
+    if esperados != obtidos:
+        divergencias += 1
+        print(f"❌ parse_paineis e extrair_paineis_coluna divergem ({len(esperados)} x {len(obtidos)} painéis)")
+
+    for linha, celula in celulas.items():
+        itens = celula.split(';')
+        novos = parse_paineis(celula)
+        if len(itens) != len(novos):
+            continue  # comentário com ';': o parser antigo não separa corretamente
+        for item, info in zip(itens, novos):
+            nome, comentario, nota = extrair_info_painel_antigo(item)
+            if nota is None or comentario is None:
+                continue  # formato antigo ou aspas duplas: o parser antigo não extraía
+            if (nome, comentario, float(nota)) != tuple(info):
+                divergencias += 1
+                print(f"❌ Linha {linha}: antigo={(nome, comentario, nota)} novo={info}")
+
+    print(f"{'✅' if not divergencias else '❌'} {len(celulas)} células / {len(esperados)} painéis verificados, "
+          f"{divergencias} divergência(s)")
+    return divergencias
+
+
+# =========================== SUÍTE E REGISTRO DOS RESULTADOS ===========================
+
+def medir(resultados, etapa, quantidade, funcao, *args, **extras):
+    """
+    Cronometra funcao(*args), imprime e acrescenta o tempo a resultados. Retorna o resultado da função.
+    """
+    resultado, segundos = cronometrar(funcao, *args)
+    resultados.append({'etapa': etapa, 'respostas': quantidade, 'segundos': round(segundos, 4), **extras})
+    print(f"⏱️ {etapa:<28} {quantidade:>8} respostas: {segundos:9.3f}s")
+    return resultado
+
+
+def benchmark_suite(tamanhos=TAMANHOS_SUITE):
+    """
+    Mede, para cada tamanho de base: parser de painéis, tratamento (legado e versão 2),
+    leitura/escrita da base em Excel, tratamento em blocos de ponta a ponta e Parquet.
+    """
+    resultados = []
+    for quantidade in tamanhos:
+        print(f"🧪 Base sintética com {quantidade} respostas")
+        legado = gerar_base_sintetica(quantidade)
+        atual = gerar_base_sintetica(quantidade, formato='v2')
+
+        medir(resultados, 'parse_paineis', quantidade, parse_paineis_lote, legado[COL_PAINEIS])
+        medir(resultados, 'tratamento_legado', quantidade, silenciado(tratar_dataframe), legado)
+        tratado = medir(resultados, 'tratamento_v2', quantidade, tratar_dataframe, atual)
+
+        with tempfile.TemporaryDirectory() as pasta:
+            base = os.path.join(pasta, 'base.xlsx')
+            final = os.path.join(pasta, 'tratada.xlsx')
+            medir(resultados, 'excel_escrita_base', quantidade, lambda: atual.to_excel(base, index=False))
+            medir(resultados, 'excel_leitura_base', quantidade, pd.read_excel, base)
+            medir(resultados, 'tratamento_blocos_excel', quantidade, silenciado(tratar_base_em_blocos), base, final)
+            medir(resultados, 'parquet_escrita', quantidade, salvar_parquet, tratado, final)
+            medir(resultados, 'parquet_leitura', quantidade, ler_parquet, caminho_parquet(final))
+    return resultados
+
+
+def simular_envios(enviar, usuarios, envios_por_usuario):
+    """
+    Dispara envios simultâneos (uma thread por usuário) e retorna (segundos, latências em s, sucessos).
+    """
+    latencias, sucessos = [], 0
+    trava = threading.Lock()
+
+    def usuario(u):
+        nonlocal sucessos
+        for k in range(envios_por_usuario):
+            resposta = montar_resposta(
+                f"usuario{u}@mrv.com.br", {"PAP - Dossiê": {"comentario": "", "nota": 8}},
+                [{"Nome": f"Ferramenta {u}-{k}", "Objetivo": "Teste", "Tipo": "Excel",
+                  "Categoria": "OUTROS", "Importância": "🪙 Importante", "Horas": 4.0}]
+            )
+            inicio = time.perf_counter()
+            try:
+                ok = enviar(resposta)
+            except Exception:
+                ok = False
+            with trava:
+                latencias.append(time.perf_counter() - inicio)
+                sucessos += bool(ok)
+
+    threads = [threading.Thread(target=usuario, args=(u,)) for u in range(usuarios)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - inicio, latencias, sucessos
+
+
+def benchmark_envios(usuarios=20, envios_por_usuario=5):
+    """
+    Envios simultâneos contra a API do GitHub simulada (github_local), em cada estratégia de gravação:
+    planilha (ler-alterar-gravar com sha), segmentos, fila em lote e caixa de saída local.
+    """
+    total = usuarios * envios_por_usuario
+    resultados = []
+    for estrategia in ('planilha', 'segmentos', 'fila_planilha', 'caixa_saida'):
+        servidor, url = iniciar_servidor()
+        modo = 'planilha' if 'planilha' in estrategia else 'segmentos'
+        backend = BackendGitHub("token", "usuario", "repo", "main", "base.xlsx", api_url=url, modo=modo)
+        saida = io.BytesIO()
+        pd.DataFrame(columns=[COL_EMAIL, COL_DATA, COL_PAINEIS, COL_FERRAMENTAS]).to_excel(saida, index=False)
+        backend._put("base.xlsx", saida.getvalue(), "Base inicial")
+
+        with tempfile.TemporaryDirectory() as pasta:
+            if estrategia == 'fila_planilha':
+                fila = FilaEnvio(backend, janela=0.2)
+                enviar = lambda resposta: fila.enviar(resposta).result(timeout=120)
+            elif estrategia == 'caixa_saida':
+                caixa = CaixaSaida(backend, os.path.join(pasta, 'caixa_saida.db'), janela=0.2)
+                enviar = lambda resposta: bool(caixa.enviar(resposta))
+            else:
+                enviar = backend.anexar
+
+            inicio = time.perf_counter()
+            segundos, latencias, sucessos = simular_envios(enviar, usuarios, envios_por_usuario)
+            if estrategia == 'caixa_saida':
+                # A latência é a da confirmação local; o tempo total vai até a entrega de todos os pendentes
+                limite = time.monotonic() + 120
+                while caixa.pendentes() and time.monotonic() < limite:
+                    time.sleep(0.05)
+                segundos = time.perf_counter() - inicio
+                sucessos = total - caixa.pendentes()
+
+        latencias = pd.Series(latencias) * 1000
+        resultados.append({
+            'etapa': f'envios_{estrategia}', 'respostas': total, 'segundos': round(segundos, 4),
+            'usuarios': usuarios, 'sucessos': sucessos, 'requisicoes': servidor.repositorio.requisicoes,
+            'latencia_p50_ms': round(latencias.quantile(0.5), 1), 'latencia_p95_ms': round(latencias.quantile(0.95), 1),
+        })
+        print(f"📨 {estrategia:<14} {sucessos}/{total} gravados em {segundos:.2f}s · "
+              f"{servidor.repositorio.requisicoes} requisições · latência p50 {latencias.quantile(0.5):.0f} ms, "
+              f"p95 {latencias.quantile(0.95):.0f} ms")
+        servidor.shutdown()
+    return resultados
+
+
+def registrar_resultados(resultados, arquivo=ARQUIVO_RESULTADOS):
+    """
+    Acrescenta os resultados ao histórico (JSONL), com data e dados da máquina.
+    """
+    contexto = {
+        'data': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+    with open(arquivo, 'a', encoding='utf-8') as f:
+        for resultado in resultados:
+            f.write(json.dumps({**contexto, **resultado}, ensure_ascii=False) + '\n')
+
+
+def comparar_com_anterior(resultados, arquivo=ARQUIVO_RESULTADOS, tolerancia=TOLERANCIA_REGRESSAO):
+    """
+    Compara cada etapa com a última medição registrada da mesma etapa e tamanho.
+    Retorna a lista de regressões (etapa, respostas, segundos antes, segundos agora).
+    """
+    anteriores = {}
+    if os.path.exists(arquivo):
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    registro = json.loads(linha)
+                    anteriores[(registro['etapa'], registro['respostas'])] = registro['segundos']
+
+    regressoes = []
+    for resultado in resultados:
+        chave = (resultado['etapa'], resultado['respostas'])
+        antes, agora = anteriores.get(chave), resultado['segundos']
+        if antes is not None and agora > antes * (1 + tolerancia) and agora - antes > 0.05:
+            regressoes.append((*chave, antes, agora))
+            print(f"⚠️ Regressão em {chave[0]} ({chave[1]} respostas): {antes:.3f}s -> {agora:.3f}s")
+    if not regressoes:
+        print("✅ Nenhuma regressão em relação à execução anterior")
+    return regressoes
+
+
+def executar_e_registrar(resultados):
+    regressoes = comparar_com_anterior(resultados)
+    registrar_resultados(resultados)
+    print(f"📝 Resultados gravados em {ARQUIVO_RESULTADOS}")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    modo = argumentos.pop(0) if argumentos and not argumentos[0].isdigit() else 'tratamento'
+
+    if modo == 'paineis':
+        benchmark_paineis(int(argumentos[0]) if argumentos else 100_000)
+    elif modo == 'verificar':
+        sys.exit(1 if verificar_paineis(*argumentos) else 0)
+    elif modo == 'suite':
+        sys.exit(executar_e_registrar(benchmark_suite([int(a) for a in argumentos] or TAMANHOS_SUITE)))
+    elif modo == 'envios':
+        sys.exit(executar_e_registrar(benchmark_envios(*[int(a) for a in argumentos])))
+    else:
+        benchmark_tratamento(int(argumentos[0]) if argumentos else 100_000)
@@ -0,0 +1,14 @@
+from armazenamento import compactar_respostas, PASTA_RESPOSTAS
+
+# Planilha consolidada (snapshot) e pasta com os envios pendentes
+arquivo = 'base_dados_pesquisa_PO.xlsx'
+apenas_ultimas = False  # True para manter na planilha só a resposta mais recente de cada e-mail
+
+# Junta os segmentos de respostas nos arquivos diários (respostas/diarios), incorpora-os à planilha
+# e remove os já processados
+total = compactar_respostas(arquivo, PASTA_RESPOSTAS, apenas_ultimas)
+
+if total:
+    print(f"✅ Compactação concluída! {total} resposta(s) incorporada(s) em '{arquivo}'")
+else:
+    print(f"ℹ️ Nenhuma resposta pendente em '{PASTA_RESPOSTAS}'")
@@ -0,0 +1,185 @@
+import json
+import uuid
+import hashlib
+from datetime import datetime
+from parser_paineis import parse_paineis
+from opcoes_pesquisa import categoria_lista
+
+# Formato estruturado (versionado) de cada envio da pesquisa.
+#
+# Versão 1 (legado): "Painéis" e "Ferramentas" são textos unidos por "; " — painéis como
+# "Nome: {'comentario': ..., 'nota': ...}" e ferramentas como JSON (ou, nas respostas mais
+# antigas, campos separados por vírgula).
+# Versão 2: "Painéis" é uma lista de {"Nome", "Nota", "Comentário"} e "Ferramentas" uma lista
+# de {"Nome", "Objetivo", "Tipo", "Categoria", "Importância", "Horas"}. Em formatos tabulares
+# (xlsx, SQLite) as listas são gravadas como texto JSON, com a coluna "Versão" = 2.
+
+VERSAO_ESQUEMA = 2
+
+COL_VERSAO = 'Versão'
+COL_ID = 'ID do Envio'
+COL_EMAIL = 'E-mail MRV'
+COL_DATA = 'Data/Hora do Envio'
+COL_PAINEIS = 'Painéis'
+COL_FERRAMENTAS = 'Ferramentas'
+
+CAMPOS_FERRAMENTA = ['Nome', 'Objetivo', 'Tipo', 'Categoria', 'Importância', 'Horas']
+
+# Categorias do formulário, usadas para reconhecer a coluna opcional de categoria
+# nas ferramentas antigas separadas por vírgula
+CATEGORIAS = set(categoria_lista)
+
+
+def montar_resposta(email, feedbacks, ferramentas, data=None, id_envio=None):
+    """
+    Monta o registro de um envio no formato versão 2.
+    feedbacks: {painel: {"comentario": ..., "nota": ...}} como coletado no app.
+    ferramentas: lista de dicionários com os CAMPOS_FERRAMENTA.
+    """
+    return {
+        COL_VERSAO: VERSAO_ESQUEMA,
+        COL_ID: id_envio or uuid.uuid4().hex,
+        COL_EMAIL: email,
+        COL_DATA: data or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        COL_PAINEIS: [
+            {"Nome": painel, "Nota": fb.get("nota"), "Comentário": fb.get("comentario", "")}
+            for painel, fb in feedbacks.items()
+        ],
+        COL_FERRAMENTAS: [{campo: f.get(campo) for campo in CAMPOS_FERRAMENTA} for f in ferramentas],
+    }
+
+
+def eh_versao_atual(registro):
+    try:
+        return int(registro.get(COL_VERSAO)) == VERSAO_ESQUEMA
+    except (TypeError, ValueError):
+        return False
+
+
+def resposta_para_linha(resposta):
+    """
+    Achata um registro versão 2 para uma linha tabular (listas como texto JSON).
+    Registros legados são devolvidos sem alteração.
+    """
+    if not eh_versao_atual(resposta):
+        return dict(resposta)
+    linha = dict(resposta)
+    for coluna in (COL_PAINEIS, COL_FERRAMENTAS):
+        if not isinstance(linha.get(coluna), str):
+            linha[coluna] = json.dumps(linha.get(coluna) or [], ensure_ascii=False)
+    return linha
+
+
+def linha_para_resposta(linha, posicao=None):
+    """
+    Converte uma linha tabular (versão 2 ou legada) em registro versão 2.
+    posicao é a ordem da linha na base (ver id_envio_legado).
+    """
+    if not eh_versao_atual(linha):
+        return migrar_resposta(linha, posicao)
+    resposta = dict(linha)
+    resposta[COL_VERSAO] = VERSAO_ESQUEMA
+    for coluna in (COL_PAINEIS, COL_FERRAMENTAS):
+        if isinstance(resposta.get(coluna), str):
+            resposta[coluna] = json.loads(resposta[coluna])
+    return resposta
+
+
+def _campos_legados(item):
+    """
+    Separa um item legado em campos: vírgula nas primeiras versões do app, '_' em algumas
+    respostas antigas. Só aceita a separação se o último campo for o número de horas.
+    """
+    for separador in (',', '_'):
+        partes = item.split(separador)
+        if len(partes) < 4:
+            continue
+        try:
+            return partes, float(partes[-1]), separador
+        except ValueError:
+            continue
+    return None
+
+
+def migrar_ferramenta_legada(item):
+    """
+    Converte um item de ferramenta legado (JSON ou campos separados) em dicionário.
+    O formato separado é lido da direita para a esquerda (Horas, Importância, [Categoria], Tipo);
+    o que sobra é "Nome,Objetivo" (ou "Nome :Objetivo" nas primeiras respostas).
+    Retorna None se o item não puder ser interpretado.
+    """
+    item = item.strip()
+    if item.startswith('{'):
+        try:
+            registro = json.loads(item)
+        except json.JSONDecodeError:
+            return None
+        return {campo: registro.get(campo) for campo in CAMPOS_FERRAMENTA} if isinstance(registro, dict) else None
+
+    campos = _campos_legados(item)
+    if campos is None:
+        return None
+    partes, horas, separador = campos
+    importancia = partes[-2].strip()
+    if partes[-3].strip() in CATEGORIAS and len(partes) >= 5:
+        categoria, tipo, resto = partes[-3].strip(), partes[-4].strip(), partes[:-4]
+    else:
+        categoria, tipo, resto = None, partes[-3].strip(), partes[:-3]
+
+    if len(resto) >= 2:
+        nome, objetivo = resto[0], separador.join(resto[1:])
+    else:
+        resto = resto[0] if resto else ''
+        nome, _, objetivo = resto.partition(':' if ':' in resto else ',')
+    return {
+        "Nome": nome.strip(), "Objetivo": objetivo.strip(), "Tipo": tipo,
+        "Categoria": categoria, "Importância": importancia, "Horas": horas,
+    }
+
+
+def migrar_ferramentas_legadas(celula):
+    """
+    Converte uma célula inteira de Ferramentas. Como os itens eram unidos por ';', um objetivo
+    que contenha ';' aparece partido em dois itens: um item não reconhecido é juntado ao
+    seguinte antes de ser descartado.
+    """
+    if not isinstance(celula, str):
+        return []
+    ferramentas, pendente = [], ''
+    for item in celula.split(';'):
+        ferramenta = migrar_ferramenta_legada(f"{pendente};{item}") if pendente else None
+        if ferramenta is None:
+            ferramenta = migrar_ferramenta_legada(item)
+            if ferramenta is None:
+                pendente = f"{pendente};{item}" if pendente else item.strip()
+                continue
+        ferramentas.append(ferramenta)
+        pendente = ''
+    return ferramentas
+
+
+def id_envio_legado(email, data, posicao=None):
+    """
+    ID determinístico para respostas migradas: migrar duas vezes gera o mesmo ID.
+    A posição da linha na base entra no hash: respostas antigas sem data (ou com a mesma
+    data) do mesmo e-mail não podem receber o mesmo ID.
+    """
+    chave = f"{data}|{email}" if posicao is None else f"{posicao}|{data}|{email}"
+    return hashlib.sha1(chave.encode('utf-8')).hexdigest()[:32]
+
+
+def migrar_resposta(linha, posicao=None):
+    """
+    Converte uma resposta legada (células de texto) em registro versão 2.
+    As demais colunas da linha são preservadas.
+    """
+    resposta = dict(linha)
+    email, data = linha.get(COL_EMAIL), linha.get(COL_DATA)
+
+    resposta[COL_VERSAO] = VERSAO_ESQUEMA
+    resposta[COL_ID] = linha.get(COL_ID) if isinstance(linha.get(COL_ID), str) else id_envio_legado(email, data, posicao)
+    resposta[COL_PAINEIS] = [
+        {"Nome": p.nome, "Nota": p.nota, "Comentário": p.comentario} for p in parse_paineis(linha.get(COL_PAINEIS))
+    ]
+    resposta[COL_FERRAMENTAS] = migrar_ferramentas_legadas(linha.get(COL_FERRAMENTAS))
+    return resposta
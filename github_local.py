@@ -0,0 +1,148 @@
+import json
+import base64
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Servidor local que imita a API de conteúdos do GitHub (GET/PUT em /repos/{usuario}/{repo}/contents/{caminho}).
+# Como a API real, devolve ETag nas leituras de arquivo e responde 304 a um If-None-Match igual,
+# e mantém a conexão aberta (HTTP/1.1) para testar o reuso de conexões.
+# Permite testar o app e os backends de armazenamento sem acesso à internet:
+#   servidor, url = iniciar_servidor()
+#   backend = BackendGitHub("token", "usuario", "repo", "main", "base.xlsx", api_url=url)
+
+
+def calcular_sha(conteudo):
+    """
+    Calcula o sha no mesmo formato do git (blob).
+    """
+    return hashlib.sha1(b"blob %d\0" % len(conteudo) + conteudo).hexdigest()
+
+
+class RepositorioEmMemoria:
+    """
+    Guarda os arquivos do repositório simulado: caminho -> (conteúdo, sha).
+    """
+
+    def __init__(self):
+        self.arquivos = {}
+        self.lock = threading.Lock()
+        self.requisicoes = 0
+        self.nao_modificados = 0  # respostas 304
+        self.conexoes = 0  # conexões TCP abertas pelos clientes
+
+    def ler(self, caminho):
+        with self.lock:
+            return self.arquivos.get(caminho)
+
+    def listar(self, pasta):
+        prefixo = pasta.rstrip('/') + '/'
+        with self.lock:
+            return [
+                (caminho, sha) for caminho, (_, sha) in sorted(self.arquivos.items())
+                if caminho.startswith(prefixo) and '/' not in caminho[len(prefixo):]
+            ]
+
+    def gravar(self, caminho, conteudo, sha_esperado):
+        """
+        Grava o arquivo respeitando o controle de concorrência por sha.
+        Retorna (status HTTP, sha novo ou None).
+        """
+        with self.lock:
+            atual = self.arquivos.get(caminho)
+            if atual is not None and sha_esperado != atual[1]:
+                return 409, None
+            if atual is None and sha_esperado:
+                return 409, None
+            sha = calcular_sha(conteudo)
+            self.arquivos[caminho] = (conteudo, sha)
+            return (200 if atual else 201), sha
+
+
+class ManipuladorGitHub(BaseHTTPRequestHandler):
+    repositorio = None  # definido por iniciar_servidor()
+    protocol_version = 'HTTP/1.1'  # keep-alive: várias requisições por conexão
+
+    def setup(self):
+        super().setup()
+        with self.repositorio.lock:
+            self.repositorio.conexoes += 1
+
+    def log_message(self, *args):
+        pass  # silencia o log padrão do http.server
+
+    def _caminho(self):
+        partes = urlparse(self.path).path.split('/contents/', 1)
+        return partes[1] if len(partes) == 2 else None
+
+    def _responder(self, status, corpo=None, cabecalhos=None):
+        dados = json.dumps(corpo or {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        self.repositorio.requisicoes += 1
+        caminho = self._caminho()
+        arquivo = self.repositorio.ler(caminho) if caminho else None
+        if arquivo is None:
+            itens = self.repositorio.listar(caminho) if caminho else []
+            if itens:
+                return self._responder(200, [
+                    {"path": p, "name": p.rsplit('/', 1)[-1], "sha": sha, "type": "file"} for p, sha in itens
+                ])
+            return self._responder(404, {"message": "Not Found"})
+        conteudo, sha = arquivo
+        etag = f'"{sha}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.repositorio.nao_modificados += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self._responder(200, {
+            "path": caminho,
+            "sha": sha,
+            "encoding": "base64",
+            "content": base64.b64encode(conteudo).decode('utf-8')
+        }, {'ETag': etag})
+
+    def do_PUT(self):
+        self.repositorio.requisicoes += 1
+        caminho = self._caminho()
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = json.loads(self.rfile.read(tamanho) or b'{}')
+        conteudo = base64.b64decode(corpo.get("content", ""))
+        status, sha = self.repositorio.gravar(caminho, conteudo, corpo.get("sha"))
+        if sha is None:
+            return self._responder(status, {"message": f"{caminho} does not match"})
+        self._responder(status, {"content": {"path": caminho, "sha": sha}})
+
+
+def iniciar_servidor(porta=0, repositorio=None):
+    """
+    Sobe o servidor em uma thread em segundo plano.
+    Retorna (servidor, url_base); use servidor.shutdown() para encerrar.
+    """
+    repositorio = repositorio or RepositorioEmMemoria()
+    manipulador = type('ManipuladorLocal', (ManipuladorGitHub,), {'repositorio': repositorio})
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), manipulador)
+    servidor.repositorio = repositorio
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+if __name__ == "__main__":
+    servidor, url = iniciar_servidor(8765)
+    print(f"🧪 API do GitHub simulada em: {url}")
+    print("Use api_url nos secrets [github] para apontar o app para este servidor.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        print("🛑 Servidor encerrado.")
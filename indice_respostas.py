@@ -0,0 +1,136 @@
+from esquema_resposta import COL_EMAIL, COL_ID
+
+# Índice das respostas por respondente.
+#
+# Cada pessoa responde a pesquisa com o seu e-mail MRV; quem envia de novo está corrigindo a
+# resposta anterior. O índice é um par de dicionários (tabelas hash): e-mail normalizado ->
+# posição da resposta mais recente e ID do envio -> posição. Indexar uma resposta nova e
+# descobrir qual ela substitui são operações O(1), sem varrer a base.
+#
+# Modos de envio dos backends ([armazenamento] modo_envio):
+#   anexar     - todo envio vira uma linha nova (comportamento original);
+#   substituir - o envio apaga a resposta anterior da mesma pessoa (ou do mesmo ID do envio);
+#   versionar  - a resposta anterior é mantida como histórico, marcada como inativa.
+
+MODOS_ENVIO = ('anexar', 'substituir', 'versionar')
+
+
+def chave_email(email):
+    """
+    Normaliza o e-mail para o índice (sem espaços, minúsculo); None se estiver vazio.
+    """
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return email.strip().lower()
+
+
+class IndiceRespostas:
+    """
+    Índice hash das respostas de uma base, na ordem em que foram gravadas (a posição é a
+    ordem da linha na base). Respostas sem e-mail não identificam a pessoa e ficam todas.
+    """
+
+    def __init__(self):
+        self.por_email = {}
+        self.por_id = {}
+        self.sem_email = []
+        self.tamanho = 0
+
+    @classmethod
+    def de_dataframe(cls, df, inicio=0):
+        """
+        Indexa as linhas de uma base bruta (posições a partir de inicio).
+        """
+        indice = cls()
+        indice.adicionar_dataframe(df, inicio)
+        return indice
+
+    def adicionar_dataframe(self, df, inicio=None):
+        """
+        Indexa as linhas de um trecho da base; retorna as posições que elas substituíram.
+        """
+        inicio = self.tamanho if inicio is None else inicio
+        emails = df[COL_EMAIL].tolist() if COL_EMAIL in df else [None] * len(df)
+        ids = df[COL_ID].tolist() if COL_ID in df else [None] * len(df)
+        substituidas = []
+        for posicao, (email, id_envio) in enumerate(zip(emails, ids), start=inicio):
+            anterior = self.adicionar(email, posicao, id_envio)
+            if anterior is not None:
+                substituidas.append(anterior)
+        return substituidas
+
+    def adicionar(self, email, posicao, id_envio=None):
+        """
+        Indexa a resposta gravada na posição. Retorna a posição da resposta que ela substitui
+        (a anterior da mesma pessoa) ou None.
+        """
+        if isinstance(id_envio, str) and id_envio:
+            self.por_id[id_envio] = posicao
+        self.tamanho = max(self.tamanho, posicao + 1)
+        chave = chave_email(email)
+        if chave is None:
+            self.sem_email.append(posicao)
+            return None
+        anterior = self.por_email.get(chave)
+        self.por_email[chave] = posicao
+        return anterior
+
+    def posicao(self, email):
+        """
+        Posição da resposta mais recente da pessoa (None se ela ainda não respondeu).
+        """
+        return self.por_email.get(chave_email(email))
+
+    def posicao_envio(self, id_envio):
+        return self.por_id.get(id_envio)
+
+    def eh_atual(self, email, posicao):
+        """
+        True se a resposta na posição é a mais recente da pessoa (ou não tem e-mail).
+        """
+        chave = chave_email(email)
+        return chave is None or self.por_email.get(chave) == posicao
+
+    def posicoes_atuais(self):
+        """
+        Posições das respostas mais recentes de cada pessoa, em ordem crescente.
+        """
+        return sorted([*self.por_email.values(), *self.sem_email])
+
+    def __contains__(self, email):
+        return chave_email(email) in self.por_email
+
+    def __len__(self):
+        return len(self.por_email)
+
+
+def ultimas_respostas(df, indice=None):
+    """
+    Mantém só a resposta mais recente de cada pessoa, na ordem original da base.
+    """
+    if indice is None:
+        indice = IndiceRespostas.de_dataframe(df)
+    return df.iloc[indice.posicoes_atuais()]
+
+
+def atuais_do_lote(respostas):
+    """
+    Para um lote de respostas (dicionários, na ordem de envio), True nas que são a última
+    da pessoa e do ID do envio dentro do próprio lote.
+    """
+    indice = IndiceRespostas()
+    for posicao, resposta in enumerate(respostas):
+        indice.adicionar(resposta.get(COL_EMAIL), posicao, resposta.get(COL_ID))
+    return [
+        indice.eh_atual(resposta.get(COL_EMAIL), posicao) and indice.por_id.get(resposta.get(COL_ID), posicao) == posicao
+        for posicao, resposta in enumerate(respostas)
+    ]
+
+
+def mascara_atuais(bloco, indice):
+    """
+    Máscara das linhas de um bloco (índice = posição na base) que são as mais recentes
+    de cada pessoa, segundo um índice montado sobre a base inteira.
+    """
+    emails = bloco[COL_EMAIL].tolist() if COL_EMAIL in bloco else [None] * len(bloco)
+    return [indice.eh_atual(email, posicao) for email, posicao in zip(emails, bloco.index.tolist())]
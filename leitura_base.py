@@ -0,0 +1,156 @@
+import os
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+# Leitura e escrita da base em blocos de tamanho fixo, para que o uso de memória
+# não cresça com o número de respostas.
+
+TAMANHO_BLOCO_PADRAO = 5000
+
+
+def _blocos_excel(arquivo, tamanho_bloco):
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = wb.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(cabecalho)]
+        bloco, inicio = [], 0
+        for linha in linhas:
+            if all(v is None for v in linha):
+                continue
+            bloco.append(linha)
+            if len(bloco) == tamanho_bloco:
+                yield pd.DataFrame(bloco, columns=colunas, index=range(inicio, inicio + len(bloco)))
+                inicio += len(bloco)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=colunas, index=range(inicio, inicio + len(bloco)))
+    finally:
+        wb.close()
+
+
+def _blocos_parquet(arquivo, tamanho_bloco):
+    import pyarrow.parquet as pq  # dependência opcional, só para entrada em Parquet
+    inicio = 0
+    for lote in pq.ParquetFile(arquivo).iter_batches(batch_size=tamanho_bloco):
+        bloco = lote.to_pandas()
+        bloco.index = range(inicio, inicio + len(bloco))
+        inicio += len(bloco)
+        yield bloco
+
+
+def ler_base_em_blocos(arquivo, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """
+    Lê a base (xlsx, csv, jsonl ou parquet) em blocos de até tamanho_bloco linhas.
+    O índice de cada bloco continua a numeração do anterior, como em uma leitura única.
+    """
+    extensao = os.path.splitext(arquivo)[1].lower()
+    if extensao in ('.xlsx', '.xlsm'):
+        yield from _blocos_excel(arquivo, tamanho_bloco)
+    elif extensao == '.csv':
+        yield from pd.read_csv(arquivo, chunksize=tamanho_bloco)
+    elif extensao == '.jsonl':
+        yield from pd.read_json(arquivo, lines=True, chunksize=tamanho_bloco)
+    elif extensao == '.parquet':
+        yield from _blocos_parquet(arquivo, tamanho_bloco)
+    else:
+        raise ValueError(f"Formato de base não suportado: {extensao}")
+
+
+class EscritorExcelIncremental:
+    """
+    Escreve uma planilha bloco a bloco (openpyxl em modo write_only),
+    sem manter todas as linhas em memória.
+    """
+
+    def __init__(self, arquivo, colunas):
+        self.arquivo = arquivo
+        self.colunas = list(colunas)
+        self.linhas = 0
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet()
+        self._ws.append(self.colunas)
+
+    def anexar(self, df):
+        df = df.reindex(columns=self.colunas).astype(object)
+        for linha in df.where(df.notna(), None).itertuples(index=False, name=None):
+            self._ws.append(linha)
+        self.linhas += len(df)
+
+    def fechar(self):
+        self._wb.save(self.arquivo)
+
+
+def _parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Saída em Parquet requer o pacote pyarrow (pip install pyarrow)")
+    return pa, pq
+
+
+class EscritorParquetIncremental:
+    """
+    Escreve um arquivo Parquet bloco a bloco ou, com colunas_particao,
+    um dataset particionado (pasta com um subdiretório por valor da partição).
+    modelo é um DataFrame vazio com as colunas e tipos da saída, usado para gravar um
+    arquivo vazio (mas com esquema) quando nenhuma linha é recebida.
+    """
+
+    def __init__(self, destino, colunas_particao=None, modelo=None):
+        self.destino = destino
+        self.colunas_particao = list(colunas_particao or [])
+        self.modelo = modelo
+        self.linhas = 0
+        self._esquema = None
+        self._writer = None
+        self._partes = 0
+
+    def anexar(self, df):
+        pa, pq = _parquet()
+        tabela = pa.Table.from_pandas(df, schema=self._esquema, preserve_index=False)
+        self._esquema = tabela.schema
+        if self.colunas_particao:
+            pq.write_to_dataset(
+                tabela, self.destino, partition_cols=self.colunas_particao,
+                basename_template=f"parte-{self._partes:05d}-{{i}}.parquet"
+            )
+            self._partes += 1
+        else:
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.destino, tabela.schema)
+            self._writer.write_table(tabela)
+        self.linhas += len(df)
+
+    def fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+            return
+        if self.colunas_particao and self.linhas:
+            return
+        # Nenhuma linha gravada: grava um arquivo vazio com o esquema, para a leitura por
+        # colunas funcionar; no dataset particionado, dentro da pasta (que o pyarrow não cria)
+        pa, pq = _parquet()
+        if self.modelo is not None:
+            tabela = pa.Table.from_pandas(self.modelo, preserve_index=False)
+        elif self._esquema is not None:
+            tabela = self._esquema.empty_table()
+        else:
+            tabela = pa.table({})
+        if self.colunas_particao:
+            os.makedirs(self.destino, exist_ok=True)
+            pq.write_table(tabela, os.path.join(self.destino, "parte-vazia.parquet"))
+        else:
+            pq.write_table(tabela, self.destino)
+
+
+def ler_parquet(caminho, colunas=None, filtros=None):
+    """
+    Lê um arquivo ou dataset Parquet com memory-map, só com as colunas pedidas
+    e, opcionalmente, filtrando partições (ex.: filtros=[('Dia', '>=', '2025-06-01')]).
+    """
+    _, pq = _parquet()
+    return pq.read_table(caminho, columns=colunas, filters=filtros, memory_map=True).to_pandas()
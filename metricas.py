@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import MemoryHandler, RotatingFileHandler
+
+# Instrumentação do tratamento e do app: tempos por etapa, contadores (linhas, erros,
+# status das chamadas ao GitHub) e log com buffer e rotação.
+#
+# O log não abre e fecha o arquivo a cada linha: as mensagens ficam em um buffer em memória
+# (MemoryHandler) e vão para o arquivo em blocos — quando o buffer enche, quando chega um ERROR
+# ou quando descarregar_log() é chamado ao fim de cada tratamento. O arquivo é rotacionado ao
+# atingir TAMANHO_MAXIMO_LOG (mantém COPIAS_LOG arquivos antigos: .1, .2, ...).
+
+METRICAS_FILE = 'metricas_pesquisa.json'
+TAMANHO_MAXIMO_LOG = 1_000_000
+COPIAS_LOG = 3
+CAPACIDADE_BUFFER_LOG = 200
+
+_loggers = {}
+_trava_loggers = threading.Lock()
+
+
+def configurar_log(arquivo, nome='pesquisa'):
+    """
+    Retorna o logger com buffer e rotação que escreve em arquivo (criado uma única vez por nome).
+    """
+    with _trava_loggers:
+        if nome in _loggers:
+            return _loggers[nome]
+        arquivo_log = RotatingFileHandler(arquivo, maxBytes=TAMANHO_MAXIMO_LOG, backupCount=COPIAS_LOG,
+                                          encoding='utf-8', delay=True)
+        arquivo_log.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        buffer = MemoryHandler(CAPACIDADE_BUFFER_LOG, flushLevel=logging.ERROR, target=arquivo_log)
+        logger = logging.getLogger(nome)
+        logger.setLevel(logging.INFO)
+        logger.addHandler(buffer)
+        logger.propagate = False
+        _loggers[nome] = logger
+        return logger
+
+
+def descarregar_log(nome='pesquisa'):
+    """
+    Grava no arquivo as mensagens que estão no buffer.
+    """
+    logger = _loggers.get(nome)
+    if logger is not None:
+        for handler in logger.handlers:
+            handler.flush()
+
+
+class Metricas:
+    """
+    Contadores e tempos por etapa, seguros para uso entre threads.
+    Para cada etapa guarda execuções, tempo total, último e máximo (em segundos).
+    """
+
+    def __init__(self, arquivo=METRICAS_FILE):
+        self.arquivo = arquivo
+        self._trava = threading.Lock()
+        self.iniciado_em = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.contadores = {}
+        self.etapas = {}
+
+    def contar(self, nome, quantidade=1):
+        with self._trava:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def registrar_tempo(self, nome, segundos):
+        with self._trava:
+            etapa = self.etapas.setdefault(nome, {'execucoes': 0, 'total_s': 0.0, 'ultimo_s': 0.0, 'maximo_s': 0.0})
+            etapa['execucoes'] += 1
+            etapa['total_s'] += segundos
+            etapa['ultimo_s'] = segundos
+            etapa['maximo_s'] = max(etapa['maximo_s'], segundos)
+
+    @contextmanager
+    def etapa(self, nome):
+        """
+        Cronometra o bloco como uma execução da etapa (também quando o bloco falha).
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio)
+
+    def registrar_chamada_github(self, metodo, status, segundos):
+        """
+        Latência e status de uma chamada à API do GitHub (status None = falha de rede/timeout).
+        """
+        self.registrar_tempo(f'github_{metodo.lower()}', segundos)
+        self.contar(f'github_{metodo.lower()}_status_{status or "erro"}')
+
+    def resumo(self):
+        with self._trava:
+            etapas = {
+                nome: {**dados, 'media_s': dados['total_s'] / dados['execucoes']}
+                for nome, dados in self.etapas.items()
+            }
+            return {
+                'iniciado_em': self.iniciado_em,
+                'atualizado_em': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'contadores': dict(self.contadores),
+                'etapas': {nome: {k: round(v, 4) if isinstance(v, float) else v for k, v in dados.items()}
+                           for nome, dados in etapas.items()},
+            }
+
+    def salvar(self, arquivo=None):
+        """
+        Grava o resumo em JSON (arquivo temporário + troca atômica, para leitores nunca verem meio arquivo).
+        """
+        arquivo = arquivo or self.arquivo
+        temporario = f"{arquivo}.tmp{os.getpid()}"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.resumo(), f, ensure_ascii=False, indent=2)
+        os.replace(temporario, arquivo)
+
+
+# Instância única do processo (watcher ou app)
+metricas = Metricas()
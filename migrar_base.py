@@ -0,0 +1,36 @@
+import os
+import pandas as pd
+import shutil
+from leitura_base import ler_base_em_blocos, EscritorExcelIncremental
+from esquema_resposta import COL_VERSAO, COL_ID, linha_para_resposta, resposta_para_linha
+
+# Migração única da base para o formato estruturado (versão 2): as células de texto
+# "Painéis" e "Ferramentas" viram listas JSON e cada resposta ganha "Versão" e "ID do Envio".
+# Linhas já migradas são mantidas como estão, então rodar de novo não altera a base.
+
+# Planilha consolidada e cópia de segurança do formato antigo
+arquivo = 'base_dados_pesquisa_PO.xlsx'
+backup = 'base_dados_pesquisa_PO_legado.xlsx'
+
+if not os.path.exists(backup):
+    shutil.copy2(arquivo, backup)
+
+temporario = f"{arquivo}.tmp.xlsx"
+escritor = None
+for bloco in ler_base_em_blocos(arquivo):
+    if escritor is None:
+        colunas = [COL_VERSAO, COL_ID] + [c for c in bloco.columns if c not in (COL_VERSAO, COL_ID)]
+        escritor = EscritorExcelIncremental(temporario, colunas)
+    # O índice do bloco é a posição da linha na base: entra no ID das respostas legadas
+    linhas = [
+        resposta_para_linha(linha_para_resposta(linha, posicao))
+        for posicao, linha in zip(bloco.index, bloco.to_dict('records'))
+    ]
+    escritor.anexar(pd.DataFrame(linhas, index=bloco.index))
+
+if escritor is not None:
+    escritor.fechar()
+    os.replace(temporario, arquivo)
+    print(f"✅ Migração concluída! {escritor.linhas} resposta(s) em '{arquivo}' (cópia do formato antigo em '{backup}')")
+else:
+    print(f"ℹ️ '{arquivo}' está vazia; nada a migrar")
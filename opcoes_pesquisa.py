@@ -0,0 +1,40 @@
+# Opções oferecidas no formulário da pesquisa, compartilhadas pelo app e pela página de análises
+
+paineis_lista = [
+    "Painel Análises Forecast de Produção - PLNESROBR009",
+    "Painel do Portifólio - Planejamento da Produção - PLNESROBR004",
+    "Painel Operações - Planejamento e Controle - PLNESROBR010",
+    "Painel Produção Produtividade e MO - PLNESROBR005",
+    "PAP - Dossiê",
+    "Painel AMP x PLS - CST002", 
+    "Painel Acompanhamento de Concreto - ENGPDC032",
+    "Painel Book Normas - ENGPDC018", 
+    "Painel Cheque Obra - ENGPDC015",
+    "Painel Cockpit Produção - ENGPDC010", 
+    "Painel Comunicação Integrada - ENGPDC028",
+    "Painel Custos Produção - ENGPDC009", 
+    "Painel de Materiais - ENGPDC005",
+    "Painel Gestão de Acesso Obras - ENGPDC011", 
+    "Painel Obra 360 - ENGPDC035",
+    "Painel Performance da Produção - ENGPDC029", 
+    "Painel Qualidade - ENGPDC007",
+    "Painel SSMA Regionais - ENGPDC030", 
+    "Relatório de Métricas de Preços e Serviços - ENGPDC004",
+    "Painel Gestão de Problema Pós Entrega - ASTTCN006",
+    "Painel Vistoria da Qualidade - ASTTCN010"
+]
+
+categoria_lista = [
+    "AUXÍLIO REGIONAL", "AMP X PLS", "DISCREPÂNCIA", "PROJECT",
+    "ESTOQUE", "MOP/EMP", "CUSTOS", "REPLAN", "TURNOVER",
+    "SEQUENCIAMENTO MO", "PRODUTIVIDADE", "HORAS EXTRAS", "MATERIAIS", "URBANIZAÇÃO", "OUTROS"
+]
+
+tipo_lista = [
+    "Power BI", "Excel", "Report e-mail", "Power Point",
+    "Python", "SAP BO + Excel", "BIG + Excel", "Outra"
+]
+
+importancia_lista = [
+    "💎 Muito Importante", "🪙 Importante", "🟢 Pouco Importante", "🟠 Não Importante"
+]
@@ -0,0 +1,93 @@
+# Página de análises da pesquisa (multipage do Streamlit: aparece no menu lateral do app.py)
+import streamlit as st  # Framework principal para criação da interface web
+from armazenamento import criar_backend, BackendGitHub  # Backends de armazenamento das respostas
+from agregados_pesquisa import AgregadosPesquisa  # Agregados mantidos de forma incremental
+
+# =========================== CONFIGURAÇÃO DA PÁGINA ===========================
+
+st.set_page_config(
+    page_title="Pesquisa: Análises",
+    page_icon="logo_mrv_light.png",
+    layout="wide"
+)
+
+# =========================== AGREGADOS ===========================
+
+# Backend e agregados são compartilhados por todas as sessões; os agregados só tratam
+# as respostas que chegaram desde a última atualização.
+@st.cache_resource
+def obter_backend():
+    return criar_backend(st.secrets)
+
+@st.cache_resource
+def obter_agregados():
+    return AgregadosPesquisa()
+
+def tabelas(agregados):
+    return (agregados.linhas, agregados.media_notas(),
+            agregados.horas_por_categoria_tipo(), agregados.distribuicao_importancia())
+
+# No máximo uma atualização por minuto; entre elas, as interações usam as tabelas prontas
+@st.cache_data(ttl=60, show_spinner="Atualizando as análises...")
+def carregar_tabelas():
+    agregados = obter_agregados()
+    agregados.atualizar(obter_backend().carregar())
+    return tabelas(agregados)
+
+# Se a leitura da base falhar (ex.: erro temporário do GitHub), os agregados não são tocados
+# e a página mostra os últimos valores; a falha não fica em cache e a próxima interação tenta de novo
+try:
+    respostas, notas, horas, importancia = carregar_tabelas()
+    falha_leitura = None
+except Exception as e:
+    respostas, notas, horas, importancia = tabelas(obter_agregados())
+    falha_leitura = e
+
+# =========================== INDICADORES ===========================
+
+st.title("📊 Análises da Pesquisa: Ferramentas e Painéis")
+backend = obter_backend()
+if isinstance(backend, BackendGitHub) and backend.modo == 'segmentos':
+    st.caption("Planilha consolidada da pesquisa (snapshot), atualizada a cada minuto. Os envios gravados como "
+               "segmentos só aparecem aqui depois da compactação (compactar_base.py).")
+else:
+    st.caption("Base consolidada da pesquisa; atualizada a cada minuto.")
+if falha_leitura is not None:
+    st.warning(f"Não foi possível ler a base agora ({falha_leitura}); exibindo os últimos dados carregados.")
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Respostas", respostas)
+col2.metric("Ferramentas citadas", int(importancia.sum()))
+col3.metric("Horas mensais em ferramentas", f"{horas.to_numpy().sum():,.0f}".replace(",", "."))
+
+# =========================== PAINÉIS ===========================
+
+st.subheader("⭐ Nota média por painel")
+if notas.empty:
+    st.info("Nenhum painel avaliado até o momento.")
+else:
+    st.bar_chart(notas["Nota média"], horizontal=True)
+    st.dataframe(notas, use_container_width=True)
+
+# =========================== FERRAMENTAS ===========================
+
+st.subheader("⏱️ Horas mensais por categoria e tipo de ferramenta")
+if horas.empty:
+    st.info("Nenhuma ferramenta cadastrada até o momento.")
+else:
+    st.bar_chart(horas)
+    st.dataframe(horas, use_container_width=True)
+
+    cols = st.columns(2)
+    with cols[0]:
+        st.markdown("**Total por categoria**")
+        st.dataframe(horas.sum(axis=1).rename("Horas"), use_container_width=True)
+    with cols[1]:
+        st.markdown("**Total por tipo**")
+        st.dataframe(horas.sum(axis=0).sort_values(ascending=False).rename("Horas"), use_container_width=True)
+
+st.subheader("💎 Distribuição da importância das ferramentas")
+if importancia.sum() == 0:
+    st.info("Nenhuma ferramenta cadastrada até o momento.")
+else:
+    st.bar_chart(importancia)
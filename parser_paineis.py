@@ -0,0 +1,96 @@
+import re
+import ast
+import pandas as pd
+from typing import NamedTuple, Optional
+
+# Parser da coluna "Painéis" da base bruta.
+#
+# O app grava cada painel como "Nome: {'comentario': '...', 'nota': 8}" (repr de dicionário
+# Python) e junta os painéis com "; ". Respostas antigas usam "Nome: comentário livre"
+# e itens sem ':' trazem só o nome do painel.
+# Uma única expressão pré-compilada reconhece os dois formatos e percorre a célula inteira
+# de uma vez, inclusive quando o comentário contém ';' ou aspas. Os literais entre aspas usam
+# o padrão "desenrolado" ([^'\\]*(?:\\.[^'\\]*)*), que evita backtracking por caractere.
+
+PADRAO_PAINEL = re.compile(r"""
+    (?P<nome>[^:;]+)
+    (?::\s*
+      (?:
+          \{'comentario':\s*
+          (?P<comentario>'[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*")
+          ,\s*'nota':\s*(?P<nota>[0-9]+(?:\.[0-9]*)?)\}
+        |
+          (?P<livre>[^;]*)
+      )
+    )?
+    [ ]*(?:;|$)
+""", re.VERBOSE)
+
+
+class InfoPainel(NamedTuple):
+    nome: str
+    comentario: Optional[str]
+    nota: Optional[float]
+
+
+def _literal(texto):
+    """
+    Remove as aspas do literal; só recorre ao ast quando há sequências de escape.
+    """
+    if '\\' in texto:
+        return ast.literal_eval(texto)
+    return texto[1:-1]
+
+
+def parse_paineis(celula):
+    """
+    Decodifica uma célula inteira da coluna Painéis em uma lista de InfoPainel.
+    """
+    if not isinstance(celula, str):
+        return []
+    paineis = []
+    for nome, comentario, nota, livre in PADRAO_PAINEL.findall(celula):
+        if not nome.strip():
+            continue  # item vazio (ex.: "; ;")
+        if comentario:  # findall devolve '' para grupos que não participaram
+            paineis.append(InfoPainel(nome.strip(), _literal(comentario).strip(), float(nota)))
+        else:
+            paineis.append(InfoPainel(nome.strip(), livre.strip() or None, None))
+    return paineis
+
+
+def parse_painel(item):
+    """
+    Decodifica um único item de painel; retorna InfoPainel(nome, None, None) se não reconhecer.
+    """
+    resultado = parse_paineis(item)
+    if resultado:
+        return resultado[0]
+    return InfoPainel(str(item).split(':')[0].strip(), None, None)
+
+
+def parse_paineis_lote(celulas):
+    """
+    Decodifica várias células de uma vez (lista de listas de InfoPainel).
+    """
+    return [parse_paineis(celula) for celula in celulas]
+
+
+def extrair_paineis_coluna(serie):
+    """
+    Versão para uma Series do pandas: decodifica a coluna inteira de uma vez e retorna
+    um DataFrame com uma linha por painel (colunas _linha, Nome, Comentário e Nota),
+    em que _linha é o índice da célula de origem. Os painéis mantêm a ordem da célula.
+    """
+    linhas, paineis = [], []
+    for linha, celula in zip(serie.index.tolist(), serie.tolist()):
+        encontrados = parse_paineis(celula)
+        paineis.extend(encontrados)
+        linhas.extend([linha] * len(encontrados))
+    nomes, comentarios, notas = zip(*paineis) if paineis else ((), (), ())
+    return pd.DataFrame({
+        '_linha': pd.Series(linhas, dtype='int64'),
+        'Nome': pd.Series(nomes, dtype=object),
+        'Comentário': pd.Series(comentarios, dtype=object),
+        'Nota': pd.Series(notas, dtype='float64'),
+    })
@@ -2,123 +2,525 @@ import time
 import pandas as pd
 import os
 import json
+import logging
+import functools
+import shutil
+import threading
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from utils_pesquisa import extrair_info_painel  # A função desmembrar_ferramenta não é mais necessária
+from leitura_base import (ler_base_em_blocos, EscritorExcelIncremental, EscritorParquetIncremental,
+                          TAMANHO_BLOCO_PADRAO)
+from esquema_resposta import COL_EMAIL
+from tratamento_respostas import COLUNAS_TRATADAS, COLUNAS_NUMERICAS, tratar_dataframe, chave_resposta
+from indice_respostas import IndiceRespostas, ultimas_respostas, mascara_atuais, chave_email
+from metricas import metricas, configurar_log, descarregar_log
 
 LOG_FILE = 'tratamento_log.txt'
+METRICAS_FILE = 'tratamento_metricas.json'
 
-COL_EMAIL = 'E-mail MRV'
-COL_DATA = 'Data/Hora do Envio'
-COL_PAINEIS = 'Painéis'
-COL_FERRAMENTAS = 'Ferramentas'
+# Período de silêncio (segundos) após o último evento antes de rodar o tratamento
+ESPERA_PADRAO = 2.0
 
-def registrar_log(mensagem):
-    with open(LOG_FILE, 'a', encoding='utf-8') as f:
-        f.write(f"{mensagem}\n")
+logger = configurar_log(LOG_FILE)
 
+def registrar_log(mensagem, nivel=logging.INFO):
+    """
+    Registra no log (com buffer e rotação, ver metricas.py); erros também entram na contagem das métricas.
+    """
+    if nivel >= logging.ERROR:
+        metricas.contar('erros')
+    logger.log(nivel, mensagem)
+
+def finalizar_execucao():
+    """
+    Ao fim de cada tratamento: grava o buffer do log e o arquivo de métricas.
+    """
+    descarregar_log()
+    try:
+        metricas.salvar(METRICAS_FILE)
+    except OSError as e:
+        print(f"⚠️ Erro ao salvar as métricas: {e}")
+
+def instrumentado(etapa):
+    """
+    Decorador das execuções do tratamento: cronometra a execução inteira como uma etapa
+    e, ao final (inclusive em caso de erro), chama finalizar_execucao().
+    """
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def executar(*args, **kwargs):
+            try:
+                with metricas.etapa(etapa):
+                    return funcao(*args, **kwargs)
+            finally:
+                finalizar_execucao()
+        return executar
+    return decorar
+
+# Partições do dataset Parquet: opção -> (coluna da partição, como calculá-la)
+PARTICOES = {
+    'data': ('Dia', lambda df: df['Data'].astype('string').str[:10]),
+    'categoria': ('Categoria', lambda df: df['Ferramenta - Categoria'].astype('string')),
+}
+
+def publicar_arquivo(escrever, final_file, tentativas=5, espera=0.5):
+    """
+    Escreve em um arquivo temporário na mesma pasta e publica com uma troca atômica
+    (os.replace), para que leitores nunca vejam um arquivo pela metade.
+    Se o destino estiver bloqueado (ex.: aberto no Excel), tenta de novo algumas vezes
+    e, persistindo o bloqueio, publica com um nome versionado para não perder o trabalho.
+    Retorna o caminho efetivamente publicado.
+    """
+    pasta, nome = os.path.split(final_file)
+    base, extensao = os.path.splitext(nome)
+    temporario = os.path.join(pasta, f"{base}.tmp{os.getpid()}{extensao}")
+    try:
+        escrever(temporario)
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+    for tentativa in range(tentativas):
+        try:
+            os.replace(temporario, final_file)
+            return final_file
+        except PermissionError:
+            time.sleep(espera * (tentativa + 1))
+
+    versionado = os.path.join(pasta, f"{base}_{datetime.now():%Y%m%d_%H%M%S}{extensao}")
+    os.replace(temporario, versionado)
+    return versionado
+
+def publicar_pasta(escrever, destino):
+    """
+    Equivalente a publicar_arquivo para pastas (dataset Parquet particionado):
+    escreve em uma pasta temporária e troca pela pasta final de uma vez.
+    """
+    temporario = f"{destino}.tmp{os.getpid()}"
+    antigo = f"{destino}.antigo{os.getpid()}"
+    shutil.rmtree(temporario, ignore_errors=True)
+    try:
+        escrever(temporario)
+    except Exception:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    if os.path.exists(destino):
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return destino
+
+def ajustar_tipos(df_tratado):
+    """
+    Tipos explícitos para a saída colunar: notas e horas como float, o resto como texto.
+    """
+    df = df_tratado.reindex(columns=COLUNAS_TRATADAS).copy()
+    for coluna in COLUNAS_TRATADAS:
+        if coluna in COLUNAS_NUMERICAS:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+        else:
+            df[coluna] = df[coluna].astype('string')
+    return df
+
+def caminho_parquet(final_file, particionar_por=None):
+    base = os.path.splitext(final_file)[0]
+    return f"{base}_{particionar_por}" if particionar_por else f"{base}.parquet"
+
+def criar_escritor_parquet(destino, particionar_por=None):
+    if particionar_por and particionar_por not in PARTICOES:
+        raise ValueError(f"Partição desconhecida: {particionar_por} (use {', '.join(PARTICOES)})")
+    colunas = [PARTICOES[particionar_por][0]] if particionar_por else None
+    modelo = preparar_parquet(pd.DataFrame(columns=COLUNAS_TRATADAS), particionar_por)
+    return EscritorParquetIncremental(destino, colunas, modelo)
+
+def preparar_parquet(df_tratado, particionar_por=None):
+    df = ajustar_tipos(df_tratado)
+    if particionar_por:
+        coluna, calcular = PARTICOES[particionar_por]
+        # Valor fixo no lugar de nulos: partições nulas não são lidas de volta pelo pyarrow
+        df[coluna] = calcular(df).fillna('sem_valor')
+    return df
+
+def publicar_parquet(escrever, destino, particionar_por=None):
+    return (publicar_pasta if particionar_por else publicar_arquivo)(escrever, destino)
+
+def salvar_parquet(df_tratado, final_file, particionar_por=None):
+    """
+    Grava a base tratada em Parquet (arquivo único ou dataset particionado por
+    'data' ou 'categoria') ao lado da planilha. Retorna o caminho publicado.
+    """
+    destino = caminho_parquet(final_file, particionar_por)
+
+    def escrever(caminho):
+        escritor = criar_escritor_parquet(caminho, particionar_por)
+        escritor.anexar(preparar_parquet(df_tratado, particionar_por))
+        escritor.fechar()
+
+    return publicar_parquet(escrever, destino, particionar_por)
+
+def salvar_base_tratada(df_tratado, final_file, parquet=False, particionar_por=None):
+    """
+    Publica a base tratada (e, se pedido, a cópia em Parquet) e registra o resultado no log.
+    Retorna o caminho publicado da planilha (o final ou o versionado) ou None em caso de erro.
+    """
+    if parquet:
+        try:
+            with metricas.etapa('escrita_parquet'):
+                destino = salvar_parquet(df_tratado, final_file, particionar_por)
+            print(f'✅ Base tratada (Parquet) salva em: {destino}')
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar a base tratada em Parquet: {e}")
+            registrar_log(f"Erro ao salvar a base tratada em Parquet: {e}", logging.ERROR)
+
+    try:
+        with metricas.etapa('escrita_excel'):
+            publicado = publicar_arquivo(lambda caminho: df_tratado.to_excel(caminho, index=False), final_file)
+        print(f'✅ Base tratada salva em: {publicado}')
+        if publicado != final_file:
+            print(f"⚠️ {final_file} está bloqueado (aberto em outro programa); versão salva com outro nome.")
+
+        registrar_log(f"Tratamento concluído: {publicado} - {len(df_tratado)} registros")
+        return publicado
+    except Exception as e:
+        print(f"⚠️ Erro ao salvar a planilha tratada: {e}")
+        registrar_log(f"Erro ao salvar a planilha tratada: {e}", logging.ERROR)
+        return None
+
+def indexar_base_em_blocos(input_file, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """
+    Primeira passada do modo streaming com apenas_ultimas: monta o índice por e-mail da base inteira.
+    """
+    indice = IndiceRespostas()
+    for bloco in ler_base_em_blocos(input_file, tamanho_bloco):
+        indice.adicionar_dataframe(bloco, bloco.index[0])
+    return indice
+
+def tratar_base_em_blocos(input_file, final_file, tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+                          parquet=False, particionar_por=None, apenas_ultimas=False):
+    """
+    Modo streaming: lê, trata e grava a base bloco a bloco, com memória limitada ao bloco.
+    Com parquet=True, cada bloco também é gravado na saída Parquet na mesma passada.
+    Com apenas_ultimas=True, uma passada anterior monta o índice por e-mail e cada bloco
+    só trata as respostas mais recentes de cada pessoa.
+    """
+    total = 0
+    indice = indexar_base_em_blocos(input_file, tamanho_bloco) if apenas_ultimas else None
+
+    def escrever(caminho_xlsx, caminho_parquet=None):
+        nonlocal total
+        escritor = EscritorExcelIncremental(caminho_xlsx, COLUNAS_TRATADAS)
+        escritor_parquet = criar_escritor_parquet(caminho_parquet, particionar_por) if caminho_parquet else None
+        for bloco in ler_base_em_blocos(input_file, tamanho_bloco):
+            if indice is not None:
+                bloco = bloco[mascara_atuais(bloco, indice)]
+            tratado = tratar_dataframe(bloco)
+            with metricas.etapa('escrita_excel'):
+                escritor.anexar(tratado)
+            if escritor_parquet:
+                with metricas.etapa('escrita_parquet'):
+                    escritor_parquet.anexar(preparar_parquet(tratado, particionar_por))
+        if escritor_parquet:
+            escritor_parquet.fechar()
+        escritor.fechar()
+        total = escritor.linhas
+
+    if parquet:
+        destino = caminho_parquet(final_file, particionar_por)
+        publicado = publicar_arquivo(
+            lambda xlsx: publicar_parquet(lambda pq: escrever(xlsx, pq), destino, particionar_por),
+            final_file
+        )
+        print(f'✅ Base tratada (Parquet) salva em: {destino}')
+    else:
+        publicado = publicar_arquivo(escrever, final_file)
+    print(f'✅ Base tratada salva em: {publicado}')
+    registrar_log(f"Tratamento concluído: {publicado} - {total} registros")
+    return publicado
+
+@instrumentado('tratamento')
 def tratar_base(input_file='base_dados_pesquisa_PO.xlsx', 
                 output_dir='.', 
-                base_output_name='modelo_base_dados_tratada'):
+                base_output_name='modelo_base_dados_tratada',
+                tamanho_bloco=None,
+                parquet=False,
+                particionar_por=None,
+                apenas_ultimas=False):
+    """
+    Trata a base completa. Com tamanho_bloco, usa o modo streaming (memória constante).
+    Com parquet=True, grava também a base em Parquet (particionada por 'data' ou
+    'categoria' se particionar_por for informado).
+    Com apenas_ultimas=True, só a resposta mais recente de cada e-mail entra na base tratada.
+    """
     print(f"🔄 Detectada atualização. Iniciando tratamento...")
 
+    final_file = os.path.join(output_dir, f"{base_output_name}.xlsx")
+
+    if tamanho_bloco:
+        try:
+            tratar_base_em_blocos(input_file, final_file, tamanho_bloco, parquet, particionar_por, apenas_ultimas)
+        except Exception as e:
+            print(f"⚠️ Erro no tratamento em blocos: {e}")
+            registrar_log(f"Erro no tratamento em blocos: {e}", logging.ERROR)
+        return
+
     try:
-        df = pd.read_excel(input_file)
+        with metricas.etapa('leitura'):
+            df = pd.read_excel(input_file)
     except Exception as e:
         print(f"⚠️ Erro ao ler a planilha: {e}")
-        registrar_log(f"{datetime.now()} - ERRO ao ler a planilha: {e}")
+        registrar_log(f"Erro ao ler a planilha: {e}", logging.ERROR)
         return
 
-    registros_tratados = []
-
-    for idx, row in df.iterrows():
-        email = row[COL_EMAIL]
-        data = row[COL_DATA]
-
-        # Painéis
-        paineis_raw = str(row.get(COL_PAINEIS, '')).split(';')
-        for painel_item in paineis_raw:
-            if painel_item.strip() == '':
-                continue
-            nome, comentario, nota = extrair_info_painel(painel_item)
-            registros_tratados.append({
-                'E-mail': email,
-                'Data': data,
-                'Tipo': 'Ferramenta',
-                'Nome': '',
-                'Comentário': '',
-                'Nota': '',
-                'Ferramenta - Nome': f_partes.get('Nome', ''),
-                'Ferramenta - Objetivo': f_partes.get('Objetivo', ''),
-                'Ferramenta - Tipo': f_partes.get('Tipo', ''),
-                'Ferramenta - Categoria': f_partes.get('Categoria', ''),
-                'Ferramenta - Importância': f_partes.get('Importância', ''),
-                'Ferramenta - Horas gastas mensais': float(f_partes.get('Horas', 0)) if str(f_partes.get('Horas', '')).replace('.', '', 1).isdigit() else ''
-            })
-
-
-        # Ferramentas
-        ferramentas_raw = str(row.get(COL_FERRAMENTAS, '')).split(';')
-        for ferramenta_item in ferramentas_raw:
-            ferramenta_item = ferramenta_item.strip()
-            if ferramenta_item == '':
-                continue
+    if apenas_ultimas:
+        df = ultimas_respostas(df)
+    df_tratado = tratar_dataframe(df)
+    salvar_base_tratada(df_tratado, final_file, parquet, particionar_por)
 
-            try:
-                f_partes = json.loads(ferramenta_item)
-            except json.JSONDecodeError:
-                print(f"❌ Erro ao decodificar JSON: {ferramenta_item}")
-                registrar_log(f"{datetime.now()} - ERRO ao decodificar JSON: {ferramenta_item}")
-                continue
-
-            registros_tratados.append({
-                'E-mail': email,
-                'Data': data,
-                'Tipo': 'Ferramenta',
-                'Nome': '',  # Mantemos em branco para evitar redundância
-                'Comentário': '',
-                'Nota': '',
-                'Ferramenta - Nome': f_partes.get('Nome', ''),
-                'Ferramenta - Objetivo': f_partes.get('Objetivo', ''),
-                'Ferramenta - Tipo': f_partes.get('Tipo', ''),
-                'Ferramenta - Categoria': f_partes.get('Categoria', ''),
-                'Ferramenta - Importância': f_partes.get('Importância', ''),
-                'Ferramenta - Horas gastas mensais': f_partes.get('Horas', '')
-            })
-
-    df_tratado = pd.DataFrame(registros_tratados)
+def tratar_arquivo(arquivo):
+    """
+    Tarefa de um processo do pool: lê (xlsx, csv, jsonl ou parquet) e trata um arquivo inteiro.
+    """
+    blocos = list(ler_base_em_blocos(arquivo))
+    if not blocos:
+        return pd.DataFrame(columns=COLUNAS_TRATADAS)
+    return tratar_dataframe(pd.concat(blocos))
+
+@instrumentado('tratamento_paralelo')
+def tratar_bases(input_files,
+                 output_dir='.',
+                 base_output_name='modelo_base_dados_tratada',
+                 processos=None,
+                 tamanho_particao=None,
+                 parquet=False,
+                 particionar_por=None):
+    """
+    Trata várias bases (ex.: uma planilha por regional ou por onda da pesquisa) em paralelo,
+    uma por processo de um ProcessPoolExecutor (processos=None usa todos os núcleos).
+    Com tamanho_particao, cada base é lida em partições de linhas e as partições é que são
+    distribuídas entre os processos (útil para uma única base grande).
+    O resultado é concatenado sempre na ordem de entrada (arquivos na ordem informada e
+    partições na ordem das linhas), independentemente de qual processo termina primeiro.
+    Retorna o caminho publicado da planilha ou None em caso de erro.
+    """
+    if isinstance(input_files, str):
+        input_files = [input_files]
+    print(f"🔄 Tratando {len(input_files)} base(s) em paralelo...")
 
     final_file = os.path.join(output_dir, f"{base_output_name}.xlsx")
 
     try:
-        df_tratado.to_excel(final_file, index=False)
-        print(f'✅ Base tratada salva em: {final_file}')
-
-        log_msg = f"{datetime.now()} - Tratamento concluído: {final_file} - {len(df_tratado)} registros"
-        registrar_log(log_msg)
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            if tamanho_particao:
+                futuros = [
+                    pool.submit(tratar_dataframe, particao)
+                    for arquivo in input_files
+                    for particao in ler_base_em_blocos(arquivo, tamanho_particao)
+                ]
+            else:
+                futuros = [pool.submit(tratar_arquivo, arquivo) for arquivo in input_files]
+            partes = [futuro.result() for futuro in futuros]
     except Exception as e:
-        print(f"⚠️ Erro ao salvar a planilha tratada: {e}")
-        registrar_log(f"{datetime.now()} - ERRO ao salvar a planilha tratada: {e}")
+        print(f"⚠️ Erro no tratamento em paralelo: {e}")
+        registrar_log(f"Erro no tratamento em paralelo: {e}", logging.ERROR)
+        return None
+
+    partes = [parte for parte in partes if not parte.empty]
+    df_tratado = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_TRATADAS)
+    metricas.contar('registros_tratados_paralelo', len(df_tratado))
+    return salvar_base_tratada(df_tratado, final_file, parquet, particionar_por)
+
+class TratamentoIncremental:
+    """
+    Trata apenas as respostas novas desde a última execução.
+
+    O checkpoint guarda quantas linhas da base já foram tratadas e a chave
+    (data/hora + e-mail) da última delas. Se a base só cresceu, apenas as linhas
+    novas passam pelo tratamento e são anexadas à base tratada mantida em memória;
+    se a base foi reescrita (linha do checkpoint mudou ou sumiu), trata tudo de novo.
+
+    Com apenas_ultimas=True, mantém também o índice por e-mail das linhas já tratadas:
+    uma resposta nova de quem já respondeu remove da base tratada os registros da anterior.
+
+    Limitação: só o tratamento é incremental; a base bruta é lida inteira e a base tratada
+    é regravada inteira a cada execução (E/S proporcional ao tamanho da base).
+    """
+
+    def __init__(self, input_file, output_dir, base_output_name, parquet=False, particionar_por=None,
+                 apenas_ultimas=False):
+        self.input_file = input_file
+        self.parquet = parquet
+        self.particionar_por = particionar_por
+        self.apenas_ultimas = apenas_ultimas
+        self.indice = None
+        self.final_file = os.path.join(output_dir, f"{base_output_name}.xlsx")
+        self.checkpoint_file = os.path.join(output_dir, f"{base_output_name}.checkpoint.json")
+        self.df_tratado = None
+        self.linhas = 0
+        self.chave = None
+        self.pendente = False  # True quando a última gravação falhou
+
+    def _restaurar(self):
+        self.df_tratado = pd.DataFrame(columns=COLUNAS_TRATADAS)
+        self.linhas, self.chave = 0, None
+        if not (os.path.exists(self.checkpoint_file) and os.path.exists(self.final_file)):
+            return
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            self.df_tratado = pd.read_excel(self.final_file)
+            self.linhas, self.chave = checkpoint['linhas'], checkpoint['chave']
+        except Exception as e:
+            print(f"⚠️ Checkpoint inválido, a base será tratada por completo: {e}")
+            self.df_tratado = pd.DataFrame(columns=COLUNAS_TRATADAS)
+            self.linhas, self.chave = 0, None
+
+    def _salvar_checkpoint(self):
+        def escrever(caminho):
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump({'linhas': self.linhas, 'chave': self.chave}, f, ensure_ascii=False)
+        publicar_arquivo(escrever, self.checkpoint_file)
+
+    def _substituir_anteriores(self, df, novas):
+        """
+        Indexa as respostas novas, remove da base tratada as respostas anteriores das mesmas
+        pessoas e retorna só as novas que são as mais recentes de cada pessoa.
+        """
+        # O índice cobre exatamente as linhas já tratadas; é remontado após reinício ou base reescrita
+        if self.indice is None or self.indice.tamanho != self.linhas:
+            self.indice = IndiceRespostas.de_dataframe(df.iloc[:self.linhas])
+
+        substituidas = [p for p in self.indice.adicionar_dataframe(novas, self.linhas) if p < self.linhas]
+        if substituidas:
+            emails = {chave_email(email) for email in df[COL_EMAIL].iloc[substituidas]}
+            anteriores = self.df_tratado['E-mail'].map(chave_email).isin(emails)
+            self.df_tratado = self.df_tratado[~anteriores].reset_index(drop=True)
+            print(f"🔁 {len(emails)} pessoa(s) reenviaram a resposta; a anterior foi substituída.")
+        return novas[mascara_atuais(novas, self.indice)]
+
+    @instrumentado('tratamento_incremental')
+    def executar(self):
+        print(f"🔄 Detectada atualização. Iniciando tratamento incremental...")
+
+        try:
+            with metricas.etapa('leitura'):
+                df = pd.read_excel(self.input_file)
+        except Exception as e:
+            print(f"⚠️ Erro ao ler a planilha: {e}")
+            registrar_log(f"Erro ao ler a planilha: {e}", logging.ERROR)
+            return
+
+        if self.df_tratado is None:
+            self._restaurar()
+
+        # A base foi reescrita (não apenas cresceu): descarta o acumulado e trata tudo
+        if self.linhas and (len(df) < self.linhas or chave_resposta(df.iloc[self.linhas - 1]) != self.chave):
+            print("♻️ Base reescrita desde o último tratamento. Tratando todas as respostas...")
+            self.df_tratado = pd.DataFrame(columns=COLUNAS_TRATADAS)
+            self.linhas, self.chave = 0, None
+
+        novas = df.iloc[self.linhas:]
+        if novas.empty and not self.pendente:
+            print("ℹ️ Nenhuma resposta nova para tratar.")
+            return
+
+        if not novas.empty:
+            if self.apenas_ultimas:
+                novas = self._substituir_anteriores(df, novas)
+            self.df_tratado = pd.concat([self.df_tratado, tratar_dataframe(novas)], ignore_index=True)
+            self.linhas, self.chave = len(df), chave_resposta(df.iloc[-1])
+
+        # O checkpoint só avança quando o arquivo principal foi atualizado; se saiu uma
+        # versão com outro nome, a próxima execução tenta publicar no principal de novo
+        publicado = salvar_base_tratada(self.df_tratado, self.final_file, self.parquet, self.particionar_por)
+        self.pendente = publicado != self.final_file
+        if not self.pendente:
+            self._salvar_checkpoint()
+
+class AgendadorTratamento:
+    """
+    Agrupa rajadas de eventos do sistema de arquivos em uma única execução.
+
+    Cada evento marca a base como "suja" e reinicia a contagem do período de silêncio;
+    uma única thread executa a função quando a rajada termina. Eventos que chegam
+    durante uma execução geram exatamente uma nova execução depois dela.
+    """
+
+    def __init__(self, funcao, espera=ESPERA_PADRAO):
+        self.funcao = funcao
+        self.espera = espera
+        self._condicao = threading.Condition()
+        self._ultimo_evento = 0.0
+        self._sujo = False
+        self._thread = threading.Thread(target=self._trabalhar, name='tratamento', daemon=True)
+        self._thread.start()
+
+    def notificar(self):
+        with self._condicao:
+            self._ultimo_evento = time.monotonic()
+            self._sujo = True
+            self._condicao.notify()
+
+    def _aguardar_silencio(self):
+        with self._condicao:
+            while not self._sujo:
+                self._condicao.wait()
+            while True:
+                restante = self._ultimo_evento + self.espera - time.monotonic()
+                if restante <= 0:
+                    break
+                self._condicao.wait(restante)
+            self._sujo = False
+
+    def _trabalhar(self):
+        while True:
+            self._aguardar_silencio()
+            try:
+                self.funcao()
+            except Exception as e:
+                print(f"⚠️ Erro inesperado no tratamento: {e}")
+                registrar_log(f"Erro inesperado no tratamento: {e}", logging.ERROR)
 
 class MonitorHandler(FileSystemEventHandler):
-    def __init__(self, input_file, output_dir, base_output_name):
+    def __init__(self, input_file, output_dir, base_output_name, espera=ESPERA_PADRAO,
+                 parquet=False, particionar_por=None, apenas_ultimas=False):
         super().__init__()
         self.input_file = input_file
         self.output_dir = output_dir
         self.base_output_name = base_output_name
+        self.tratamento = TratamentoIncremental(input_file, output_dir, base_output_name, parquet, particionar_por,
+                                                apenas_ultimas)
+        self.agendador = AgendadorTratamento(self.tratamento.executar, espera)
+
+    def _eh_arquivo_monitorado(self, caminho):
+        return os.path.basename(self.input_file) == os.path.basename(caminho)
 
     def on_modified(self, event):
-        if not event.is_directory and os.path.basename(self.input_file) in event.src_path:
-            tratar_base(self.input_file, self.output_dir, self.base_output_name)
+        if not event.is_directory and self._eh_arquivo_monitorado(event.src_path):
+            self.agendador.notificar()
+
+    def on_created(self, event):
+        self.on_modified(event)
+
+    def on_moved(self, event):
+        # O Excel salva em um arquivo temporário e depois renomeia para o nome final
+        if not event.is_directory and self._eh_arquivo_monitorado(event.dest_path):
+            self.agendador.notificar()
 
 if __name__ == "__main__":
     input_file = 'base_dados_pesquisa_PO.xlsx'
     output_dir = '.'
     base_output_name = 'modelo_base_dados_tratada'
+    saida_parquet = False  # True para gravar também modelo_base_dados_tratada.parquet
+    particionar_por = None  # 'data' ou 'categoria' para um dataset Parquet particionado
+    apenas_ultimas = False  # True para manter só a resposta mais recente de cada e-mail
 
     path = os.path.dirname(os.path.abspath(input_file)) or '.'
-    event_handler = MonitorHandler(input_file, output_dir, base_output_name)
+    event_handler = MonitorHandler(input_file, output_dir, base_output_name, espera=ESPERA_PADRAO,
+                                   parquet=saida_parquet, particionar_por=particionar_por,
+                                   apenas_ultimas=apenas_ultimas)
     observer = Observer()
     observer.schedule(event_handler, path=path, recursive=False)
 
@@ -126,6 +528,8 @@ if __name__ == "__main__":
     print(f"📂 Pasta monitorada: {path}")
     print(f"📄 Arquivo monitorado: {input_file}")
     print(f"📝 Log: {os.path.abspath(LOG_FILE)}")
+    print(f"📈 Métricas: {os.path.abspath(METRICAS_FILE)}")
+    print(f"⏳ Período de silêncio antes de tratar: {ESPERA_PADRAO}s")
 
     observer.start()
 
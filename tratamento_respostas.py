@@ -0,0 +1,199 @@
+import json
+import logging
+import pandas as pd
+from parser_paineis import extrair_paineis_coluna
+from esquema_resposta import COL_VERSAO, VERSAO_ESQUEMA, COL_EMAIL, COL_DATA, COL_PAINEIS, COL_FERRAMENTAS
+from metricas import metricas
+
+# Tratamento da base bruta (uma linha por envio) para a base tratada (uma linha por
+# painel/ferramenta), só com funções puras sobre DataFrames. Não depende do watchdog
+# nem configura arquivos de log: é usado pelo monitoramento (tratamento_pesquisa.py)
+# e pela página de análises (agregados_pesquisa.py).
+
+# Mesmo logger que tratamento_pesquisa.py configura (buffer e rotação em tratamento_log.txt);
+# fora do monitoramento ele não tem arquivo e os avisos seguem o padrão do logging
+logger = logging.getLogger('pesquisa')
+
+COLUNAS_TRATADAS = [
+    'E-mail', 'Data', 'Tipo', 'Nome', 'Comentário', 'Nota',
+    'Ferramenta - Nome', 'Ferramenta - Objetivo', 'Ferramenta - Tipo',
+    'Ferramenta - Categoria', 'Ferramenta - Importância', 'Ferramenta - Horas gastas mensais'
+]
+
+# Campos do JSON de cada ferramenta -> coluna da base tratada
+CAMPOS_FERRAMENTA = {
+    'Nome': 'Ferramenta - Nome',
+    'Objetivo': 'Ferramenta - Objetivo',
+    'Tipo': 'Ferramenta - Tipo',
+    'Categoria': 'Ferramenta - Categoria',
+    'Importância': 'Ferramenta - Importância',
+    'Horas': 'Ferramenta - Horas gastas mensais',
+}
+
+COLUNAS_NUMERICAS = ['Nota', 'Ferramenta - Horas gastas mensais']
+
+def explodir_itens(df, coluna):
+    """
+    Separa a célula da coluna por ';' e gera uma linha por item (vetorizado).
+    O índice original da resposta é mantido na coluna '_linha' para preservar a ordem.
+    """
+    if coluna not in df.columns:
+        return pd.DataFrame(columns=['_linha', 'E-mail', 'Data', 'item'])
+    itens = df[coluna].dropna().astype(str).str.split(';').explode().str.strip()
+    itens = itens[itens != '']
+    return pd.DataFrame({
+        '_linha': itens.index,
+        'E-mail': df[COL_EMAIL].reindex(itens.index).values,
+        'Data': df[COL_DATA].reindex(itens.index).values,
+        'item': itens.values,
+    })
+
+def tratar_paineis(df):
+    """
+    Extrai nome, comentário e nota de todos os painéis de uma vez (parser_paineis).
+    """
+    if COL_PAINEIS not in df.columns:
+        return pd.DataFrame(columns=['_linha', 'E-mail', 'Data', 'Tipo', 'Nome', 'Comentário', 'Nota'])
+    paineis = extrair_paineis_coluna(df[COL_PAINEIS])
+    paineis.insert(1, 'E-mail', df[COL_EMAIL].reindex(paineis['_linha']).values)
+    paineis.insert(2, 'Data', df[COL_DATA].reindex(paineis['_linha']).values)
+    paineis['Tipo'] = 'Painel'
+    return paineis
+
+def registrar_json_invalido(item):
+    # Um aviso por item vai só para o log (em buffer); a tela recebe um resumo por lote
+    metricas.contar('json_invalidos')
+    logger.warning(f"JSON inválido: {item}")
+
+def decodificar_json_lote(itens):
+    """
+    Decodifica uma Series de objetos JSON em uma única chamada a json.loads.
+    Itens que nem começam com '{' são descartados antes (ex.: formato antigo com vírgulas);
+    se ainda assim o lote falhar, decodifica item a item só para achar os inválidos.
+    Retorna (lista de dicionários, máscara booleana dos itens válidos).
+    """
+    validos = (itens.str.startswith('{') & itens.str.endswith('}')).tolist()
+    invalidos = itens[[not v for v in validos]]
+    for item in invalidos:
+        registrar_json_invalido(item)
+    if len(invalidos):
+        print(f"⚠️ {len(invalidos)} item(ns) de ferramenta fora do formato JSON ignorado(s) (detalhes no log)")
+
+    candidatos = [item for item, valido in zip(itens, validos) if valido]
+    try:
+        registros = json.loads('[' + ','.join(candidatos) + ']')
+        if len(registros) == len(candidatos) and all(isinstance(r, dict) for r in registros):
+            return registros, validos
+    except json.JSONDecodeError:
+        pass
+
+    registros = []
+    posicoes = [i for i, valido in enumerate(validos) if valido]
+    for posicao, item in zip(posicoes, candidatos):
+        try:
+            registro = json.loads(item)
+        except json.JSONDecodeError:
+            registro = None
+        if not isinstance(registro, dict):
+            registrar_json_invalido(item)
+            print(f"❌ Erro ao decodificar JSON: {item}")
+            validos[posicao] = False
+            continue
+        registros.append(registro)
+    return registros, validos
+
+def tratar_ferramentas(df):
+    """
+    Normaliza todos os itens de ferramenta (JSON) em colunas de uma vez.
+    """
+    itens = explodir_itens(df, COL_FERRAMENTAS)
+    registros, validos = decodificar_json_lote(itens['item'])
+    itens = itens[pd.Series(validos, index=itens.index, dtype=bool)].reset_index(drop=True)
+
+    campos = pd.DataFrame.from_records(registros, columns=list(CAMPOS_FERRAMENTA)).rename(columns=CAMPOS_FERRAMENTA)
+    campos['Ferramenta - Horas gastas mensais'] = pd.to_numeric(campos['Ferramenta - Horas gastas mensais'], errors='coerce')
+    itens = pd.concat([itens.drop(columns='item'), campos], axis=1)
+    itens['Tipo'] = 'Ferramenta'
+    return itens
+
+def decodificar_listas(celulas):
+    """
+    Decodifica as listas JSON de uma coluna no formato versão 2 em uma única chamada a json.loads.
+    Células que já são listas (ex.: lidas de um segmento JSONL) são usadas como estão.
+    """
+    celulas = celulas.tolist()
+    if all(isinstance(c, str) and c.strip() for c in celulas):
+        try:
+            return json.loads('[' + ','.join(celulas) + ']')
+        except json.JSONDecodeError:
+            pass
+    listas = []
+    for celula in celulas:
+        if isinstance(celula, list):
+            listas.append(celula)
+            continue
+        try:
+            lista = json.loads(celula) if isinstance(celula, str) else []
+        except json.JSONDecodeError:
+            registrar_json_invalido(celula)
+            lista = []
+        listas.append(lista if isinstance(lista, list) else [])
+    return listas
+
+def mascara_versao_atual(df):
+    """
+    Linhas gravadas no formato estruturado (versão 2).
+    """
+    if COL_VERSAO not in df.columns:
+        return pd.Series(False, index=df.index)
+    return pd.to_numeric(df[COL_VERSAO], errors='coerce') == VERSAO_ESQUEMA
+
+def projetar_respostas(df):
+    """
+    Trata respostas no formato versão 2: painéis e ferramentas já estão estruturados,
+    então o tratamento é só achatar as listas (sem parser de texto).
+    """
+    paineis, ferramentas = [], []
+    for linha, email, data, lista_paineis, lista_ferramentas in zip(
+            df.index.tolist(), df[COL_EMAIL].tolist(), df[COL_DATA].tolist(),
+            decodificar_listas(df[COL_PAINEIS]), decodificar_listas(df[COL_FERRAMENTAS])):
+        for painel in lista_paineis:
+            paineis.append((linha, email, data, painel.get('Nome'), painel.get('Comentário'), painel.get('Nota')))
+        for ferramenta in lista_ferramentas:
+            ferramentas.append((linha, email, data) + tuple(ferramenta.get(campo) for campo in CAMPOS_FERRAMENTA))
+
+    paineis = pd.DataFrame(paineis, columns=['_linha', 'E-mail', 'Data', 'Nome', 'Comentário', 'Nota'])
+    paineis['Nota'] = pd.to_numeric(paineis['Nota'], errors='coerce')
+    ferramentas = pd.DataFrame(ferramentas, columns=['_linha', 'E-mail', 'Data', *CAMPOS_FERRAMENTA.values()])
+    ferramentas['Ferramenta - Horas gastas mensais'] = pd.to_numeric(
+        ferramentas['Ferramenta - Horas gastas mensais'], errors='coerce')
+    return paineis.assign(Tipo='Painel', _ordem=0), ferramentas.assign(Tipo='Ferramenta', _ordem=1)
+
+def tratar_dataframe(df):
+    """
+    Converte a base bruta (uma linha por envio) na base tratada (uma linha por painel/ferramenta).
+    Respostas no formato versão 2 são apenas projetadas; as legadas passam pelos parsers de texto.
+    Os itens saem na mesma ordem dos envios: painéis e depois ferramentas de cada resposta.
+    """
+    atuais = mascara_versao_atual(df)
+    legado = df[~atuais]
+    partes = []
+    if atuais.any():
+        with metricas.etapa('projecao_v2'):
+            partes += projetar_respostas(df[atuais])
+    if not legado.empty or not partes:
+        with metricas.etapa('parse_paineis'):
+            partes.append(tratar_paineis(legado).assign(_ordem=0))
+        with metricas.etapa('explodir_ferramentas'):
+            partes.append(tratar_ferramentas(legado).assign(_ordem=1))
+    tratado = pd.concat([parte for parte in partes if not parte.empty] or partes, ignore_index=True)
+    tratado = tratado.sort_values(['_linha', '_ordem'], kind='stable')
+    metricas.contar('respostas_tratadas', len(df))
+    metricas.contar('registros_tratados', len(tratado))
+    return tratado.reindex(columns=COLUNAS_TRATADAS).reset_index(drop=True)
+
+def chave_resposta(row):
+    """
+    Chave que identifica um envio: data/hora + e-mail.
+    """
+    return f"{row.get(COL_DATA)}|{row.get(COL_EMAIL)}"